@@ -0,0 +1,67 @@
+"""Compare the row-wise ``celltypelabel`` apply with ``features.cell_type_label``.
+
+Run from the repository root::
+
+    python benchmarks/bench_features.py --rows 1000000
+"""
+
+import argparse
+import os
+import sys
+import timeit
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'ect'))
+
+from features import cell_type_label, new_column  # noqa: E402
+
+
+def celltypelabel(x):
+    # The original notebook implementation, kept here as the baseline.
+    if ((x['cell_size_uniformity'] > 5) & (x['cell_shape_uniformity'] > 5)):
+        return('1')
+    else:
+        return('0')
+
+
+def make_frame(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    columns = ['cell_size_uniformity', 'cell_shape_uniformity',
+               'normal_nucleoli', 'mitoses']
+    return pd.DataFrame({column: rng.integers(1, 11, rows, dtype=np.uint8)
+                         for column in columns})
+
+
+def apply_path(df):
+    label = df.apply(lambda x: celltypelabel(x), axis=1).astype('float64')
+    product = df.normal_nucleoli.astype('float64') * df.mitoses
+    return label, product
+
+
+def vectorized_path(df):
+    return cell_type_label(df), new_column(df)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    df = make_frame(args.rows)
+
+    label, product = apply_path(df)
+    fast_label, fast_product = vectorized_path(df)
+    assert np.array_equal(label.to_numpy(), fast_label)
+    assert np.array_equal(product.to_numpy(), fast_product)
+
+    for name, func in [('apply', apply_path), ('vectorized', vectorized_path)]:
+        best = min(timeit.repeat(lambda: func(df), number=1, repeat=args.repeat))
+        print('%-10s %10d rows  %9.4f s  %12.0f rows/s'
+              % (name, args.rows, best, args.rows / best))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""Compare ``RandomForestClassifier.predict`` with the compiled ``FlatForest``.
+
+The forest is the notebook's ``RandomForestClassifier(n_estimators=100)``
+fitted on ``data/breast_cancer_data.csv``; predictions are timed on single
+rows and on a batch of synthetic rows, and checked to be identical.
+
+Run from the repository root::
+
+    python benchmarks/bench_forest.py --rows 100000
+"""
+
+import argparse
+import os
+import sys
+import timeit
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'ect'))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from forest_compiler import compile_forest  # noqa: E402
+from loading import DATA_PATH  # noqa: E402
+from preprocessing import BreastCancerPreprocessor  # noqa: E402
+from synthetic import fit_profile, generate_frame  # noqa: E402
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--data', default=DATA_PATH)
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--single', type=int, default=200,
+                        help='number of single-row predictions to time')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    raw = pd.read_csv(args.data)
+    preprocessor = BreastCancerPreprocessor().fit(raw)
+    frame = preprocessor.transform_frame(raw)
+    clf = RandomForestClassifier(n_estimators=100, random_state=args.seed).fit(
+        preprocessor.feature_matrix(frame), frame['cell_type_label'].to_numpy())
+    flat = compile_forest(clf)
+
+    rng = np.random.default_rng(args.seed)
+    batch = preprocessor.transform_frame(generate_frame(fit_profile(args.data), args.rows, rng))
+    X = preprocessor.feature_matrix(batch)
+    assert np.array_equal(clf.predict_proba(X), flat.predict_proba(X))
+    assert np.array_equal(clf.predict(X), flat.predict(X))
+
+    rows = [X[i:i + 1] for i in range(min(args.single, len(X)))]
+    for name, model in [('sklearn', clf), ('flat', flat)]:
+        single = min(timeit.repeat(lambda: [model.predict(row) for row in rows],
+                                   number=1, repeat=args.repeat)) / len(rows)
+        best = min(timeit.repeat(lambda: model.predict(X), number=1, repeat=args.repeat))
+        print('%-8s single row %9.3f ms   %8d rows %9.4f s  %12.0f rows/s'
+              % (name, single * 1000, len(X), best, len(X) / best))
+
+
+if __name__ == '__main__':
+    main()
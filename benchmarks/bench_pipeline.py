@@ -0,0 +1,162 @@
+"""Time each stage of the pipeline on synthetic data at several scales.
+
+For each size a synthetic extract is generated (see ``synthetic.py``) and the
+stages of ``ect/pipeline.py`` are run on it one by one, through the same
+modules: load, fitting ``BreastCancerPreprocessor``, ``transform_frame``
+(cleaning, doctor encoding and feature engineering), ``feature_matrix``, fit
+and predict for each model of ``model_zoo``, and writing the submission.  The
+chunked reader, ``loading.iter_clean_chunks``, is timed over the same file.
+Wall time and peak traced memory (``tracemalloc``, which also sees NumPy
+buffers) are recorded per stage and written as JSON, tagged with the current
+git commit, so runs can be compared across commits.
+
+Tracing slows every allocation down, so each stage is timed untraced and then
+run a second time under ``tracemalloc`` for its peak memory.  ``--no-memory``
+skips the second pass.
+
+Run from the repository root::
+
+    python benchmarks/bench_pipeline.py --rows 10000 1000000 --output bench.json
+
+Models that scale super-linearly (SVC, KNN) are trained on at most
+``--max-train-rows`` rows; use ``--models`` to pick a subset.
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'ect'))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from loading import iter_clean_chunks  # noqa: E402
+from model_zoo import MODELS, make_models  # noqa: E402
+from preprocessing import BreastCancerPreprocessor  # noqa: E402
+from synthetic import fit_profile, generate  # noqa: E402
+
+DEFAULT_ROWS = [10000, 1000000, 10000000]
+
+
+class StageTimer:
+    """Record wall time and peak traced memory of named stages.
+
+    The time comes from an untraced run of the stage; with ``memory`` the
+    stage is run once more under ``tracemalloc`` and its result discarded.
+    """
+
+    def __init__(self, memory=True):
+        self.memory = memory
+        self.stages = []
+
+    def run(self, name, func, *args, rows=None, **kwargs):
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        seconds = time.perf_counter() - start
+        peak = None
+        if self.memory:
+            tracemalloc.start()
+            try:
+                func(*args, **kwargs)
+                _, peak = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+        self.stages.append({
+            'stage': name,
+            'seconds': seconds,
+            'peak_bytes': peak,
+            'rows': rows,
+            'rows_per_second': rows / seconds if rows and seconds else None,
+        })
+        return result
+
+
+def bench_size(path, rows, names, max_train_rows, seed, memory=True):
+    timer = StageTimer(memory)
+    timer.run('stream_clean', lambda: sum(len(chunk) for chunk in iter_clean_chunks(path)),
+              rows=rows)
+    raw = timer.run('load', pd.read_csv, path, rows=rows)
+    preprocessor = timer.run('fit_preprocessor', BreastCancerPreprocessor().fit, raw,
+                             rows=len(raw))
+    frame = timer.run('transform_frame', preprocessor.transform_frame, raw, rows=len(raw))
+    del raw
+
+    X = timer.run('feature_matrix', preprocessor.feature_matrix, frame, rows=len(frame))
+    y = frame['cell_type_label'].to_numpy()
+    rng = np.random.default_rng(seed)
+    train = rng.random(len(X)) < 0.8
+    X_train, y_train, X_test = X[train], y[train], X[~train]
+    if len(X_train) > max_train_rows:
+        X_train, y_train = X_train[:max_train_rows], y_train[:max_train_rows]
+
+    predictions = None
+    for name, estimator in make_models(names).items():
+        timer.run('fit:%s' % name, estimator.fit, X_train, y_train, rows=len(X_train))
+        y_pred = timer.run('predict:%s' % name, estimator.predict, X_test, rows=len(X_test))
+        if name == 'Random Forest' or predictions is None:
+            predictions = y_pred
+
+    submission = pd.DataFrame({'patient_id': frame['patient_id'].to_numpy()[~train],
+                               'cell_type_label': predictions})
+    with tempfile.TemporaryDirectory() as tmp:
+        timer.run('write_submission', submission.to_csv,
+                  os.path.join(tmp, 'submission.csv'), index=False, rows=len(submission))
+    return timer.stages
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], text=True,
+                                       stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the pipeline stages at scale.')
+    parser.add_argument('--rows', type=int, nargs='+', default=DEFAULT_ROWS)
+    parser.add_argument('--models', nargs='+', default=list(MODELS), choices=list(MODELS),
+                        metavar='MODEL')
+    parser.add_argument('--max-train-rows', type=int, default=200000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default='bench_results.json')
+    parser.add_argument('--no-memory', dest='memory', action='store_false',
+                        help='only time the stages, without a traced pass for peak memory')
+    args = parser.parse_args(argv)
+
+    profile = fit_profile()
+    results = {
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'cpus': os.cpu_count(),
+        'runs': [],
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in args.rows:
+            path = os.path.join(tmp, 'patients-%d.csv' % rows)
+            generate(path, rows, profile, seed=args.seed)
+            stages = bench_size(path, rows, args.models, args.max_train_rows, args.seed,
+                                args.memory)
+            os.remove(path)
+            results['runs'].append({'rows': rows, 'stages': stages})
+            for stage in stages:
+                memory = ('%8.1f MiB' % (stage['peak_bytes'] / 2 ** 20)
+                          if stage['peak_bytes'] is not None else '')
+                print('%10d  %-40s %9.3f s  %s' % (rows, stage['stage'], stage['seconds'], memory))
+
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print('wrote %s' % args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+"""Synthetic patient extracts shaped like ``data/breast_cancer_data.csv``.
+
+``fit_profile`` measures the real file: the distribution of each cytology
+score within each class, the class balance, the doctor mix, and the rates of
+missing values, ``?`` in ``bare_nuclei`` and duplicate patient ids.
+``generate`` then writes any number of rows with the same column schema,
+value ranges and rates, in chunks so 10M-row files need little memory.
+
+Run from the repository root::
+
+    python benchmarks/synthetic.py --rows 1000000 --output /tmp/patients-1m.csv
+"""
+
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'ect'))
+
+from loading import CLASS_CATEGORIES, DATA_PATH, SCORE_COLUMNS  # noqa: E402
+
+COLUMNS = ['patient_id'] + SCORE_COLUMNS + ['class', 'doctor_name']
+SCORES = np.arange(1, 11)
+
+
+def fit_profile(path=DATA_PATH):
+    """Return the distributions and error rates of the real data set."""
+    raw = pd.read_csv(path)
+    rows = len(raw)
+    bare_nuclei = pd.to_numeric(raw['bare_nuclei'], errors='coerce')
+    scores = raw[SCORE_COLUMNS].assign(bare_nuclei=bare_nuclei)
+
+    class_p = raw['class'].value_counts(normalize=True).reindex(CLASS_CATEGORIES, fill_value=0)
+    score_p = {}
+    for name in CLASS_CATEGORIES:
+        subset = scores[raw['class'] == name]
+        score_p[name] = {
+            column: (subset[column].dropna().round().value_counts(normalize=True)
+                     .reindex(SCORES.astype(np.float64), fill_value=0).to_numpy())
+            for column in SCORE_COLUMNS
+        }
+    doctors = raw['doctor_name'].value_counts(normalize=True)
+    return {
+        'class_p': class_p.to_numpy(),
+        'score_p': score_p,
+        'doctors': doctors.index.to_numpy(),
+        'doctor_p': doctors.to_numpy(),
+        'missing_rate': {column: raw[column].isna().mean() for column in SCORE_COLUMNS},
+        'non_numeric_rate': (bare_nuclei.isna() & raw['bare_nuclei'].notna()).sum() / rows,
+        'duplicate_rate': raw['patient_id'].duplicated().mean(),
+    }
+
+
+def generate_frame(profile, rows, rng, first_id=1000000):
+    """Return ``rows`` synthetic raw records drawn from ``profile``."""
+    classes = rng.choice(len(CLASS_CATEGORIES), size=rows, p=profile['class_p'])
+    data = {'patient_id': first_id + np.arange(rows, dtype=np.int64)}
+
+    duplicates = np.flatnonzero(rng.random(rows) < profile['duplicate_rate'])
+    duplicates = duplicates[duplicates > 0]
+    if len(duplicates):
+        # Point each duplicate at a random earlier id in the chunk.
+        earlier = (rng.random(len(duplicates)) * duplicates).astype(np.int64)
+        data['patient_id'][duplicates] = data['patient_id'][earlier]
+
+    for column in SCORE_COLUMNS:
+        values = np.empty(rows, dtype=object if column == 'bare_nuclei' else np.float64)
+        for code, name in enumerate(CLASS_CATEGORIES):
+            mask = classes == code
+            p = profile['score_p'][name][column]
+            if p.sum() == 0:
+                p = np.full(len(SCORES), 1.0 / len(SCORES))
+            values[mask] = rng.choice(SCORES, size=mask.sum(), p=p / p.sum())
+        missing = rng.random(rows) < profile['missing_rate'][column]
+        values[missing] = np.nan
+        if column == 'bare_nuclei':
+            values[rng.random(rows) < profile['non_numeric_rate']] = '?'
+        data[column] = values
+
+    data['class'] = np.asarray(CLASS_CATEGORIES, dtype=object)[classes]
+    data['doctor_name'] = rng.choice(profile['doctors'], size=rows, p=profile['doctor_p'])
+    return pd.DataFrame(data, columns=COLUMNS)
+
+
+def generate(output, rows, profile=None, chunksize=1000000, seed=0):
+    """Write ``rows`` synthetic records to ``output`` as CSV."""
+    if profile is None:
+        profile = fit_profile()
+    rng = np.random.default_rng(seed)
+    written = 0
+    with open(output, 'w', newline='') as f:
+        while written < rows:
+            n = min(chunksize, rows - written)
+            frame = generate_frame(profile, n, rng, first_id=1000000 + written)
+            frame.to_csv(f, header=written == 0, index=False)
+            written += n
+    return output
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Write a synthetic patient extract.')
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--output', required=True)
+    parser.add_argument('--source', default=DATA_PATH,
+                        help='real file to take distributions and rates from')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+    generate(args.output, args.rows, fit_profile(args.source), seed=args.seed)
+
+
+if __name__ == '__main__':
+    main()
@@ -36,6 +36,10 @@ import numpy as np # linear algebra
 import pandas as pd # data processing, CSV file I/O (e.g. pd.read_csv)
 import seaborn as sns # visualization library
 
+# %% [markdown]
+# Roughly half of this notebook is exploration and plotting, which a production run never looks at. `ect/pipeline.py` runs the same load, clean, train and submit steps headless: it never imports seaborn or matplotlib, and only when a report is asked for with `--report` does `ect/report.py` aggregate the data once and `ect/eda.py` draw the tables and figures from those cached aggregates.
+# 
+
 # %% [markdown]
 # ## Load Dataset
 # 
@@ -47,6 +51,16 @@ import seaborn as sns # visualization library
 # %%
 df = pd.read_csv('data/breast_cancer_data.csv')
 
+# %% [markdown]
+# For patient extracts much larger than this sample, `ect/loading.py` reads the file in fixed-size chunks with an explicit schema (`uint8` cytology scores, `int32` patient ids, categorical `doctor_name` and `class`) and yields each chunk already cleaned, so memory stays bounded:
+#
+# ```python
+# from loading import iter_clean_chunks
+#
+# for chunk in iter_clean_chunks('data/breast_cancer_data.csv', chunksize=100000):
+#     ...
+# ```
+
 # %% [markdown]
 # ## Dataset Size
 # 
@@ -193,6 +207,15 @@ df.groupby(by =['bare_nuclei', 'class']).count()
 # %%
 df.isna().sum() 
 
+# %% [markdown]
+# Each of the `isnull()` and `isfinite` checks in this notebook is another full scan of the data. `ect/quality.py` collects missing values, non-numeric `bare_nuclei`, out-of-range scores and duplicate patient ids in a single pass, and can profile a large file chunk by chunk.
+# 
+
+# %%
+from quality import profile
+
+profile(df).to_dict()
+
 # %% [markdown]
 # Good to know that the `patient_id` has 0 missing values, but as you may notice, others columns much like `clump_thickness`, `cell_size_uniformity`, `bare_nuclei`, `bland_chromatin` and `normal_nucleoli`, and to put them in total, there are 9 missing rows in the dataset.
 # 
@@ -299,6 +322,18 @@ df.patient_id.value_counts()
 df.drop_duplicates(subset="patient_id", keep='first', inplace = True)
 df # let's print them.
 
+# %% [markdown]
+# `drop_duplicates` only sees the rows already in memory. When the data arrives in chunks or spread over several files, `ect/dedup.py` keeps the ids seen so far in a compact sorted index and applies the same keep-first rule across all of them, counting the duplicate groups as it goes:
+#
+# ```python
+# from dedup import Deduplicator
+#
+# dedup = Deduplicator()
+# for chunk in dedup.iter_files(['extract-1.csv', 'extract-2.csv']):
+#     ...
+# dedup.duplicate_groups()
+# ```
+
 # %% [markdown]
 # Great, the above code just left us with one clean and no duplicated rows of data. Now the records are down from `690` to `637`. Now let's check wheter their still duplicates from the previous list of `patient_id` we had queried earlier, let's try the `1182404` `patient_id` string for that matter.
 # 
@@ -516,11 +551,13 @@ def celltypelabel(x):
         return('0')
 
 # %% [markdown]
-# Then we use the pandas apply function to run the `celltypelabel(x)` function on the dataframe.
+# Running `celltypelabel(x)` with the pandas apply function builds a Series for every row, which gets slow on large extracts. `features.cell_type_label` applies the same rule to whole columns at once and returns a compact `uint8` array instead of `'1'`/`'0'` strings.
 # 
 
 # %%
-combined_doctors_hotEncoded_df['cell_type_label'] = combined_doctors_hotEncoded_df.apply(lambda x: celltypelabel(x), axis=1)
+from features import cell_type_label
+
+combined_doctors_hotEncoded_df['cell_type_label'] = cell_type_label(combined_doctors_hotEncoded_df)
 
 # %%
 combined_doctors_hotEncoded_df[['patient_id', 'cell_type_label']]
@@ -636,6 +673,18 @@ train.info()
 # %%
 test.info()
 
+# %% [markdown]
+# ## Reusable Preprocessing
+# 
+# All of the cleaning above is also packaged as a single scikit-learn transformer in `ect/preprocessing.py`. It is fitted once, which fixes the doctor vocabulary and column order, and can be saved and applied to new batches at scoring time without re-running this notebook.
+# 
+
+# %%
+from preprocessing import BreastCancerPreprocessor
+
+preprocessor = BreastCancerPreprocessor().fit(df)
+preprocessor.transform_frame(pd.read_csv('data/breast_cancer_data.csv')).head()
+
 # %% [markdown]
 # # Machine Learning
 # 
@@ -656,17 +705,6 @@ test = test.drop('cell_type_label', axis=1)
 # Define training and testing set
 # 
 
-# %%
-# Importing Classifier Modules
-from sklearn.linear_model import LogisticRegression
-from sklearn.svm import SVC, LinearSVC
-from sklearn.neighbors import KNeighborsClassifier
-from sklearn.tree import DecisionTreeClassifier
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.naive_bayes import GaussianNB
-from sklearn.linear_model import Perceptron
-from sklearn.linear_model import SGDClassifier
-
 # %%
 train.head()
 
@@ -684,6 +722,17 @@ X_train.shape, y_train.shape, X_test.shape
 X_train.to_csv('train.csv', encoding='utf-8', index = False)
 X_test.to_csv('test.csv', encoding='utf-8', index = False)
 
+# %% [markdown]
+# The CSV files above are handy to inspect, but every later run has to parse them again. `ect/feature_store.py` caches the engineered matrix as `.npy` arrays keyed by a hash of the source CSV, together with the fitted preprocessor, which can be memory-mapped back on the next run without re-parsing or re-engineering the features.
+# 
+
+# %%
+from feature_store import cached_features
+
+patient_ids, X_cached, y_cached, feature_meta, cached_preprocessor = cached_features(
+    'data/breast_cancer_data.csv')
+X_cached.shape, feature_meta['columns']
+
 # %%
 X_train
 
@@ -693,6 +742,17 @@ y_train
 # %%
 X_test
 
+# %% [markdown]
+# Training the nine classifiers one after another only uses a single core. `ect/model_zoo.py` fits them all at once in parallel with joblib, sharing the training matrix read-only between workers, and returns the fitted estimators and their predictions on the test set. The sections below introduce each model and read its results from here, so nothing is fitted twice.
+# 
+
+# %%
+from model_zoo import compare_models
+
+model_scores, fitted_models, predictions = compare_models(X_train, y_train, X_test, n_jobs=-1)
+scores = model_scores.set_index('Model')['Score']
+model_scores
+
 # %% [markdown]
 # ## Logistic Regression
 # 
@@ -700,10 +760,9 @@ X_test
 # 
 
 # %%
-clf = LogisticRegression()
-clf.fit(X_train, y_train)
-y_pred_log_reg = clf.predict(X_test)
-acc_log_reg = round( clf.score(X_train, y_train) * 100, 2)
+clf = fitted_models['Logistic Regression']
+y_pred_log_reg = predictions['Logistic Regression']
+acc_log_reg = scores['Logistic Regression']
 print (str(acc_log_reg) + '%')
 
 # %% [markdown]
@@ -719,10 +778,9 @@ print (str(acc_log_reg) + '%')
 # 
 
 # %%
-clf = SVC()
-clf.fit(X_train, y_train)
-y_pred_svc = clf.predict(X_test)
-acc_svc = round(clf.score(X_train, y_train) * 100, 2)
+clf = fitted_models['Support Vector Machines']
+y_pred_svc = predictions['Support Vector Machines']
+acc_svc = scores['Support Vector Machines']
 print (acc_svc)
 
 # %% [markdown]
@@ -734,10 +792,9 @@ print (acc_svc)
 # 
 
 # %%
-clf = LinearSVC()
-clf.fit(X_train, y_train)
-y_pred_linear_svc = clf.predict(X_test)
-acc_linear_svc = round(clf.score(X_train, y_train) * 100, 2)
+clf = fitted_models['Linear SVC']
+y_pred_linear_svc = predictions['Linear SVC']
+acc_linear_svc = scores['Linear SVC']
 print (acc_linear_svc)
 
 # %% [markdown]
@@ -751,10 +808,9 @@ print (acc_linear_svc)
 # 
 
 # %%
-clf = KNeighborsClassifier(n_neighbors = 3)
-clf.fit(X_train, y_train)
-y_pred_knn = clf.predict(X_test)
-acc_knn = round(clf.score(X_train, y_train) * 100, 2)
+clf = fitted_models['KNN']
+y_pred_knn = predictions['KNN']
+acc_knn = scores['KNN']
 print (acc_knn)
 
 # %% [markdown]
@@ -764,10 +820,9 @@ print (acc_knn)
 # 
 
 # %%
-clf = DecisionTreeClassifier()
-clf.fit(X_train, y_train)
-y_pred_decision_tree = clf.predict(X_test)
-acc_decision_tree = round(clf.score(X_train, y_train) * 100, 2)
+clf = fitted_models['Decision Tree']
+y_pred_decision_tree = predictions['Decision Tree']
+acc_decision_tree = scores['Decision Tree']
 print (acc_decision_tree)
 
 # %% [markdown]
@@ -779,12 +834,14 @@ print (acc_decision_tree)
 # 
 
 # %%
-clf = RandomForestClassifier(n_estimators=100)
-clf.fit(X_train, y_train)
-y_pred_random_forest = clf.predict(X_test)
-acc_random_forest = round(clf.score(X_train, y_train) * 100, 2)
+clf = fitted_models['Random Forest']
+y_pred_random_forest = predictions['Random Forest']
+acc_random_forest = scores['Random Forest']
 print (acc_random_forest)
 
+# Keep the fitted forest for the confusion matrix below.
+random_forest = clf
+
 # %% [markdown]
 # ## Gaussian Naive Bayes
 # 
@@ -796,10 +853,9 @@ print (acc_random_forest)
 # 
 
 # %%
-clf = GaussianNB()
-clf.fit(X_train, y_train)
-y_pred_gnb = clf.predict(X_test)
-acc_gnb = round(clf.score(X_train, y_train) * 100, 2)
+clf = fitted_models['Naive Bayes']
+y_pred_gnb = predictions['Naive Bayes']
+acc_gnb = scores['Naive Bayes']
 print (acc_gnb)
 
 # %% [markdown]
@@ -809,10 +865,9 @@ print (acc_gnb)
 # 
 
 # %%
-clf = Perceptron(max_iter=5, tol=None)
-clf.fit(X_train, y_train)
-y_pred_perceptron = clf.predict(X_test)
-acc_perceptron = round(clf.score(X_train, y_train) * 100, 2)
+clf = fitted_models['Perceptron']
+y_pred_perceptron = predictions['Perceptron']
+acc_perceptron = scores['Perceptron']
 print (acc_perceptron)
 
 # %% [markdown]
@@ -822,10 +877,9 @@ print (acc_perceptron)
 # 
 
 # %%
-clf = SGDClassifier(max_iter=5, tol=None)
-clf.fit(X_train, y_train)
-y_pred_sgd = clf.predict(X_test)
-acc_sgd = round(clf.score(X_train, y_train) * 100, 2)
+clf = fitted_models['Stochastic Gradient Decent']
+y_pred_sgd = predictions['Stochastic Gradient Decent']
+acc_sgd = scores['Stochastic Gradient Decent']
 print (acc_sgd)
 
 # %% [markdown]
@@ -852,8 +906,7 @@ print (acc_sgd)
 from sklearn.metrics import confusion_matrix
 import itertools
 
-clf = RandomForestClassifier(n_estimators=100)
-clf.fit(X_train, y_train)
+clf = random_forest
 y_pred_random_forest_training_set = clf.predict(X_train)
 acc_random_forest = round(clf.score(X_train, y_train) * 100, 2)
 print ("Accuracy: %i %% \n"%acc_random_forest)
@@ -916,6 +969,16 @@ models.sort_values(by='Score', ascending=False)
 # From the above table, we can see that _Decision Tree_ and _Random Forest_ classfiers have the highest accuracy score. Among these two, we choose _Random Forest_ classifier as it has the ability to limit overfitting as compared to _Decision Tree_ classifier.
 # 
 
+# %% [markdown]
+# The scores in the comparison table are measured on the same rows the models were trained on, so they flatter models that overfit, such as the decision tree. `ect/evaluation.py` scores every model with stratified 5-fold cross-validation instead. It reports accuracy, recall, ROC-AUC and out-of-fold confusion matrices, along with fit and predict timings, so models can be chosen on both quality and throughput.
+# 
+
+# %%
+from evaluation import evaluate
+
+cv_models, cv_confusion, oof_predictions = evaluate(X_train, y_train, cv=5, n_jobs=-1)
+cv_models
+
 # %% [markdown]
 # # Create Prediction
 # 
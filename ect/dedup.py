@@ -0,0 +1,116 @@
+"""Keep-first ``patient_id`` deduplication across chunks and files.
+
+The notebook calls ``drop_duplicates(subset="patient_id")`` on a fully loaded
+frame, which cannot see duplicates between chunks or between files.
+``Deduplicator`` remembers every id it has kept in a ``PatientIdIndex``, a
+handful of sorted ``int64`` runs (8 bytes per id, no Python objects), and
+drops any later row whose id is already in the index.
+
+Duplicate groups are counted as they are found, so reporting them does not
+need a sort of the whole data set.
+"""
+
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+
+class PatientIdIndex:
+    """Set of integer ids stored as sorted, disjoint NumPy runs.
+
+    New ids are added as a sorted run and runs of similar size are merged, so
+    there are only ever ``O(log n)`` runs to binary-search per lookup.
+    """
+
+    def __init__(self, runs=()):
+        self.runs = [np.asarray(run, dtype=np.int64) for run in runs]
+
+    def __len__(self):
+        return sum(len(run) for run in self.runs)
+
+    def contains(self, ids):
+        """Return a boolean mask of which ``ids`` are in the index."""
+        ids = np.asarray(ids, dtype=np.int64)
+        found = np.zeros(len(ids), dtype=bool)
+        for run in self.runs:
+            if not len(run):
+                continue
+            pos = np.searchsorted(run, ids)
+            pos[pos == len(run)] = 0
+            found |= run[pos] == ids
+        return found
+
+    def add(self, ids):
+        """Add ``ids``, which must not already be in the index."""
+        run = np.unique(np.asarray(ids, dtype=np.int64))
+        if not len(run):
+            return
+        self.runs.append(run)
+        while len(self.runs) > 1 and len(self.runs[-2]) <= 2 * len(self.runs[-1]):
+            last = self.runs.pop()
+            merged = np.concatenate([self.runs.pop(), last])
+            merged.sort(kind='mergesort')
+            self.runs.append(merged)
+
+    def save(self, path):
+        """Write the index to ``path`` as a single sorted ``.npy`` array."""
+        ids = np.concatenate(self.runs) if self.runs else np.empty(0, dtype=np.int64)
+        ids.sort()
+        np.save(path, ids)
+
+    @classmethod
+    def load(cls, path, mmap_mode=None):
+        return cls([np.load(path, mmap_mode=mmap_mode)])
+
+
+class Deduplicator:
+    """Drop rows whose ``patient_id`` was already kept, across every chunk.
+
+    Parameters
+    ----------
+    index : PatientIdIndex, optional
+        Ids already kept, for example from files processed earlier.
+    column : str, default='patient_id'
+    """
+
+    def __init__(self, index=None, column='patient_id'):
+        self.index = index if index is not None else PatientIdIndex()
+        self.column = column
+        self.dropped = 0
+        # patient_id -> number of rows dropped for it.
+        self.groups = Counter()
+        # Ids added to the index by the last ``mask`` call.
+        self.kept = np.empty(0, dtype=np.int64)
+
+    def mask(self, chunk):
+        """Return the keep-first mask for ``chunk`` and record its ids as seen."""
+        ids = chunk[self.column]
+        keep = ~ids.duplicated(keep='first').to_numpy()
+        keep &= ~self.index.contains(ids.to_numpy())
+        self.kept = ids.to_numpy()[keep].astype(np.int64)
+        self.index.add(self.kept)
+        dropped = ids.to_numpy()[~keep]
+        if len(dropped):
+            self.dropped += len(dropped)
+            self.groups.update(dropped.tolist())
+        return keep
+
+    def filter(self, chunk):
+        """Return ``chunk`` without the rows whose id was already seen."""
+        keep = self.mask(chunk)
+        return chunk if keep.all() else chunk[keep]
+
+    def iter_files(self, paths, chunksize=100000, **read_csv_kwargs):
+        """Yield deduplicated chunks of every CSV in ``paths``, in order."""
+        for path in paths:
+            for chunk in pd.read_csv(path, chunksize=chunksize, **read_csv_kwargs):
+                chunk = self.filter(chunk)
+                if len(chunk):
+                    yield chunk
+
+    def duplicate_groups(self):
+        """Return one row per duplicated id with its total number of rows."""
+        ids = np.fromiter(self.groups.keys(), dtype=np.int64, count=len(self.groups))
+        dropped = np.fromiter(self.groups.values(), dtype=np.int64, count=len(self.groups))
+        return pd.DataFrame({self.column: ids, 'occurrences': dropped + 1})
@@ -0,0 +1,67 @@
+"""Exploratory tables and figures from the notebook, drawn from aggregates.
+
+Every function takes the aggregates computed once by
+``report.compute_aggregates`` (and cached by ``report.load_aggregates``)
+instead of the full frame, so drawing a figure never re-scans the data.
+Nothing here runs at import time and matplotlib/seaborn are only imported by
+the plotting functions, so headless pipelines that never ask for a report do
+not pay for them.
+"""
+
+FIG_DIMS = (12, 6)
+
+
+def _plotting():
+    # Imported lazily: seaborn and matplotlib dominate start-up time.
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    return plt, sns
+
+
+def summary_tables(aggregates):
+    """Return the notebook's ``describe`` and ``groupby`` count tables."""
+    return {
+        'describe': aggregates['describe'],
+        'doctor_class': aggregates['doctor_class'],
+        'class_counts': aggregates['class_counts'],
+        'bare_nuclei_class': aggregates['bare_nuclei_class'],
+        'crosstab': aggregates['crosstab'],
+    }
+
+
+def plot_patients_per_doctor(aggregates):
+    plt, sns = _plotting()
+    counts = aggregates['patients_per_doctor']
+    fig, ax = plt.subplots(figsize=FIG_DIMS)
+    ax.axes.set_title("How Many Patients Per Doctor", fontsize=14)
+    sns.set_style('whitegrid')
+    sns.barplot(x=counts.index.astype(str), y=counts.to_numpy(), palette='RdBu_r', ax=ax)
+    ax.set_xlabel('doctor_name', fontsize=12)
+    ax.set_ylabel('Patients', fontsize=12)
+    sns.despine()
+    return fig
+
+
+def plot_class_per_doctor(aggregates):
+    plt, sns = _plotting()
+    counts = aggregates['doctor_class'].reset_index(name='patients')
+    fig, ax = plt.subplots(figsize=FIG_DIMS)
+    ax.axes.set_title("Class Per Doctor", fontsize=15)
+    sns.set_style('whitegrid')
+    sns.barplot(x='doctor_name', y='patients', hue='class', palette='RdBu_r',
+                data=counts, ax=ax)
+    ax.set_xlabel('Doctor Name', fontsize=12)
+    ax.set_ylabel('Patients', fontsize=12)
+    sns.despine()
+    return fig
+
+
+def plot_correlation(aggregates):
+    """Heatmap of the correlation matrix of the engineered features."""
+    plt, sns = _plotting()
+    fig, ax = plt.subplots(figsize=(30, 20))
+    sns.heatmap(aggregates['correlation'], xticklabels=True, vmax=0.6, square=True,
+                annot=True, ax=ax)
+    ax.set_xlabel("Values on X axis")
+    ax.set_ylabel('Values on Y axis')
+    return fig
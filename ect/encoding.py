@@ -0,0 +1,67 @@
+"""Compact categorical encoding of ``doctor_name``.
+
+``pd.get_dummies(df['doctor_name'])`` makes one bool column per doctor and the
+notebook then ``pd.concat``s them onto the full frame.  With thousands of
+referring physicians that is mostly zeros.  ``DoctorEncoder`` keeps one
+``int32`` code per row against a fitted vocabulary and only expands the codes
+into a one-hot matrix, sparse CSR by default, when a model asks for it.
+"""
+
+import json
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+UNKNOWN = -1
+
+
+class DoctorEncoder:
+    """Map doctor names to integer codes and codes to one-hot rows.
+
+    Names not in the fitted vocabulary get the code ``UNKNOWN`` (-1), which
+    expands to an all-zero one-hot row.
+    """
+
+    def fit(self, names):
+        names = pd.Series(names).dropna().unique()
+        self.vocabulary_ = sorted(str(name) for name in names)
+        return self
+
+    def __len__(self):
+        return len(self.vocabulary_)
+
+    def codes(self, names):
+        """Return the ``int32`` code of each name."""
+        values = names.to_numpy() if isinstance(names, pd.Series) else np.asarray(names, dtype=object)
+        return pd.Categorical(values, categories=self.vocabulary_).codes.astype(np.int32)
+
+    def one_hot(self, codes, sparse=True, dtype=np.uint8):
+        """Expand ``codes`` into an ``(n, len(vocabulary_))`` one-hot matrix.
+
+        Returns a CSR matrix with one stored value per known row, or a dense
+        array when ``sparse`` is False.
+        """
+        codes = np.asarray(codes)
+        known = codes != UNKNOWN
+        if not sparse:
+            out = np.zeros((len(codes), len(self.vocabulary_)), dtype=dtype)
+            out[np.flatnonzero(known), codes[known]] = 1
+            return out
+        indptr = np.zeros(len(codes) + 1, dtype=np.int64)
+        np.cumsum(known, out=indptr[1:])
+        indices = codes[known].astype(np.int32)
+        data = np.ones(len(indices), dtype=dtype)
+        return sp.csr_matrix((data, indices, indptr), shape=(len(codes), len(self.vocabulary_)))
+
+    def save(self, path):
+        """Write the vocabulary to ``path`` as JSON."""
+        with open(path, 'w') as f:
+            json.dump({'vocabulary': self.vocabulary_}, f, indent=2)
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            encoder = cls()
+            encoder.vocabulary_ = json.load(f)['vocabulary']
+        return encoder
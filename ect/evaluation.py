@@ -0,0 +1,151 @@
+"""Cross-validated evaluation of the model zoo.
+
+The notebook's comparison table is built from training-set accuracy and its
+confusion matrix is computed on ``X_train`` too, which rewards overfitting.
+``evaluate`` runs stratified k-fold cross-validation for every model, with one
+joblib task per (model, fold) pair, and derives all metrics from the
+out-of-fold predictions:
+
+- accuracy, recall (sensitivity) on the positive class and the confusion
+  matrix, from one ``np.bincount`` over ``2 * y + y_pred`` per model;
+- ROC-AUC, averaged over folds because decision-function scales differ
+  between fold models;
+- fit and predict time, and prediction throughput in rows per second.
+
+``precision_report`` repeats the evaluation with the feature matrix held as
+``float64`` (the notebook's type), ``float32`` and ``uint8``, and reports the
+memory each saves and the change in accuracy it causes per model.
+"""
+
+import time
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from joblib import Parallel, delayed
+from sklearn.metrics import roc_auc_score
+from sklearn.model_selection import StratifiedKFold
+
+from model_zoo import as_matrix, make_models
+from preprocessing import FEATURE_DTYPES
+
+
+def _scores(estimator, X):
+    if hasattr(estimator, 'predict_proba'):
+        return estimator.predict_proba(X)[:, 1]
+    if hasattr(estimator, 'decision_function'):
+        return estimator.decision_function(X)
+    return None
+
+
+def _fit_fold(name, estimator, X, y, train, test, fold):
+    start = time.perf_counter()
+    estimator.fit(X[train], y[train])
+    fit_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    y_pred = estimator.predict(X[test])
+    predict_time = time.perf_counter() - start
+
+    auc = np.nan
+    scores = _scores(estimator, X[test])
+    if scores is not None and len(np.unique(y[test])) == 2:
+        auc = roc_auc_score(y[test], scores)
+    return name, fold, y_pred, fit_time, predict_time, auc
+
+
+def confusion_counts(y_true, y_pred):
+    """Return the 2x2 confusion matrix of binary labels (rows are true labels)."""
+    codes = 2 * np.asarray(y_true, dtype=np.intp) + np.asarray(y_pred, dtype=np.intp)
+    return np.bincount(codes, minlength=4).reshape(2, 2)
+
+
+def evaluate(X, y, names=None, cv=5, n_jobs=-1, random_state=0, max_nbytes='1M'):
+    """Cross-validate every model and return ``(results, confusion, oof)``.
+
+    ``results`` has one row per model, best accuracy first, with ``Accuracy``,
+    ``Recall`` (on label 1), ``ROC AUC``, fit/predict seconds summed over
+    folds and ``Rows/s`` for prediction.  ``confusion`` maps model names to
+    their out-of-fold confusion matrices and ``oof`` to the out-of-fold
+    predictions themselves.
+
+    ``random_state`` seeds both the folds and every estimator that takes a
+    seed, so runs on the same data fit the same models.
+    """
+    X = as_matrix(X)
+    y = np.asarray(y).astype(np.intp)
+    folds = list(StratifiedKFold(n_splits=cv, shuffle=True,
+                                 random_state=random_state).split(np.zeros(len(y)), y))
+    sparse = sp.issparse(X)
+    names = list(make_models(names))
+
+    results = Parallel(n_jobs=n_jobs, max_nbytes=max_nbytes, mmap_mode='r')(
+        delayed(_fit_fold)(name, make_models([name], sparse, random_state)[name],
+                           X, y, train, test, fold)
+        for name in names
+        for fold, (train, test) in enumerate(folds)
+    )
+
+    oof = {name: np.empty(len(y), dtype=np.intp) for name in names}
+    timings = {name: [0.0, 0.0] for name in names}
+    aucs = {name: [] for name in names}
+    for name, fold, y_pred, fit_time, predict_time, auc in results:
+        oof[name][folds[fold][1]] = y_pred
+        timings[name][0] += fit_time
+        timings[name][1] += predict_time
+        aucs[name].append(auc)
+
+    rows = []
+    confusion = {}
+    for name in names:
+        cnf_matrix = confusion_counts(y, oof[name])
+        confusion[name] = cnf_matrix
+        (tn, fp), (fn, tp) = cnf_matrix
+        fit_time, predict_time = timings[name]
+        rows.append({
+            'Model': name,
+            'Accuracy': round((tp + tn) / len(y) * 100, 2),
+            'Recall': round(tp / (tp + fn) * 100, 2) if tp + fn else np.nan,
+            'ROC AUC': round(float(np.nanmean(aucs[name])), 4)
+                       if not np.all(np.isnan(aucs[name])) else np.nan,
+            'Fit Seconds': fit_time,
+            'Predict Seconds': predict_time,
+            'Rows/s': len(y) / predict_time if predict_time else np.inf,
+        })
+
+    table = pd.DataFrame(rows).sort_values(by='Accuracy', ascending=False)
+    return table, confusion, oof
+
+
+def _nbytes(X):
+    if sp.issparse(X):
+        return X.data.nbytes + X.indices.nbytes + X.indptr.nbytes
+    return X.nbytes
+
+
+def precision_report(X, y, names=None, dtypes=FEATURE_DTYPES, random_state=0, **kwargs):
+    """Evaluate every model with ``X`` cast to each of ``dtypes``.
+
+    Returns one row per model and dtype with the feature matrix size in MB,
+    the memory saved and the accuracy change, both relative to the first
+    dtype, and the cross-validated metrics of ``evaluate`` (which receives
+    ``kwargs``).  Every dtype is evaluated with the same ``random_state``, so
+    the folds and the estimator seeds are identical and the accuracy change
+    is down to the dtype alone.
+    """
+    X = as_matrix(X)
+    tables = []
+    for dtype in dtypes:
+        X_cast = X.astype(dtype)
+        table, _, _ = evaluate(X_cast, y, names, random_state=random_state, **kwargs)
+        table.insert(1, 'dtype', str(np.dtype(dtype)))
+        table.insert(2, 'Feature MB', _nbytes(X_cast) / 2 ** 20)
+        tables.append(table)
+    report = pd.concat(tables, ignore_index=True)
+    baseline = report[report['dtype'] == str(np.dtype(dtypes[0]))].set_index('Model')
+    report.insert(3, 'Memory Saved',
+                  1 - report['Feature MB'] / report['Model'].map(baseline['Feature MB']))
+    report.insert(5, 'Accuracy Delta',
+                  report['Accuracy'] - report['Model'].map(baseline['Accuracy']))
+    return report.sort_values(['Model', 'Feature MB'], ascending=[True, False],
+                              ignore_index=True)
@@ -0,0 +1,124 @@
+"""Memory-mapped on-disk cache of the engineered feature matrix.
+
+The notebook writes ``X_train`` and ``X_test`` as text CSV, which every later
+run has to parse again.  Here the output of ``BreastCancerPreprocessor`` is
+stored as contiguous ``.npy`` arrays, in the preprocessor's ``dtype`` (uint8
+by default), that ``np.load(..., mmap_mode='r')`` maps back without copying.
+Each entry is keyed by a hash of the source CSV and the preprocessing
+configuration, dtype included, so a repeated run on unchanged data skips both
+parsing and feature engineering.  The fitted preprocessor is saved with the
+arrays, so a training run served from the cache still has the preprocessing to
+save next to its model.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.base import clone
+
+from loading import DATA_PATH
+from preprocessing import BreastCancerPreprocessor
+
+CACHE_DIR = '.feature_cache'
+
+# Bump when the on-disk layout or the feature definitions change.
+FORMAT_VERSION = 3
+
+PREPROCESSOR = 'preprocessor.joblib'
+
+
+def file_hash(path, blocksize=1 << 20):
+    """Return the SHA-256 hex digest of the file at ``path``."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(blocksize), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def cache_key(path, config=None):
+    """Return the cache key for ``path`` preprocessed with ``config``."""
+    digest = hashlib.sha256()
+    digest.update(file_hash(path).encode())
+    digest.update(json.dumps({'version': FORMAT_VERSION, 'config': config},
+                             sort_keys=True, default=str).encode())
+    return digest.hexdigest()[:16]
+
+
+def save_features(directory, X, frame, feature_columns, metadata=None, preprocessor=None):
+    """Write a feature matrix and its engineered frame to ``directory``.
+
+    ``X.npy`` holds the dense matrix ``X`` (columns ``feature_columns``) as
+    one C-contiguous array in its own dtype, ``y.npy`` the ``cell_type_label``
+    target of ``frame`` and ``patient_id.npy`` the ids.  The fitted
+    ``preprocessor`` that built them, if given, is saved alongside.  The directory is
+    written to a temporary location first and renamed into place, so a reader
+    never sees a half-written entry.
+    """
+    parent = os.path.dirname(os.path.abspath(directory))
+    os.makedirs(parent, exist_ok=True)
+    tmp = tempfile.mkdtemp(dir=parent)
+    try:
+        np.save(os.path.join(tmp, 'X.npy'), np.ascontiguousarray(X))
+        np.save(os.path.join(tmp, 'y.npy'),
+                frame['cell_type_label'].to_numpy(dtype=np.uint8))
+        np.save(os.path.join(tmp, 'patient_id.npy'),
+                frame['patient_id'].to_numpy(dtype=np.int64))
+        if preprocessor is not None:
+            joblib.dump(preprocessor, os.path.join(tmp, PREPROCESSOR))
+        meta = dict(metadata or {}, columns=list(feature_columns), rows=len(frame))
+        with open(os.path.join(tmp, 'meta.json'), 'w') as f:
+            json.dump(meta, f, indent=2)
+        if os.path.isdir(directory):
+            shutil.rmtree(directory)
+        os.replace(tmp, directory)
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+
+
+def load_features(directory, mmap_mode='r'):
+    """Return ``(patient_id, X, y, meta)`` from ``directory``, memory-mapped.
+
+    Returns None when there is no entry at ``directory``.
+    """
+    meta_path = os.path.join(directory, 'meta.json')
+    if not os.path.exists(meta_path):
+        return None
+    with open(meta_path) as f:
+        meta = json.load(f)
+    arrays = [np.load(os.path.join(directory, name + '.npy'), mmap_mode=mmap_mode)
+              for name in ('patient_id', 'X', 'y')]
+    return arrays[0], arrays[1], arrays[2], meta
+
+
+def cached_features(path=DATA_PATH, preprocessor=None, cache_dir=CACHE_DIR):
+    """Return the engineered features of ``path``, building them on a miss.
+
+    The result is ``(patient_id, X, y, meta, fitted)``: the first four as from
+    ``load_features``, where ``meta['columns']`` is the feature column order
+    and ``meta['doctors']`` the doctor vocabulary, and ``fitted`` the
+    preprocessor fitted on ``path``.  ``preprocessor`` only supplies the
+    configuration; it is cloned, never fitted itself.
+    """
+    if preprocessor is None:
+        preprocessor = BreastCancerPreprocessor()
+    directory = os.path.join(cache_dir, cache_key(path, preprocessor.get_params()))
+    cached = load_features(directory)
+    if cached is None:
+        fitted = clone(preprocessor)
+        raw = pd.read_csv(path)
+        fitted.fit(raw)
+        frame = fitted.transform_frame(raw)
+        save_features(directory, fitted.feature_matrix(frame), frame,
+                      list(fitted.get_feature_names_out()),
+                      metadata={'source': path, 'doctors': fitted.doctors_},
+                      preprocessor=fitted)
+        cached = load_features(directory)
+    return cached + (joblib.load(os.path.join(directory, PREPROCESSOR)),)
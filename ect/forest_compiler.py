@@ -0,0 +1,160 @@
+"""Flatten a fitted random forest into NumPy arrays for low-latency prediction.
+
+``RandomForestClassifier.predict`` walks each tree separately and dispatches
+the trees through joblib, which dominates the latency of small batches.
+``compile_forest`` concatenates the nodes of every tree into flat arrays
+(split feature, threshold, left and right child, normalized leaf value) and
+``FlatForest`` descends one tree at a time with one vectorized step per level,
+for the rows that have not reached a leaf yet.
+
+This pays off for single rows and small batches, where it avoids sklearn's
+per-call overhead.  On large batches sklearn's compiled per-row traversal is
+faster than NumPy's per-level gathers, so keep the sklearn model for bulk
+scoring and use the compiled one for low-latency serving.
+
+The compiled forest is also the only form of a forest that can be shared
+between processes: unpickling an sklearn tree copies its node arrays into
+buffers the tree owns, whereas the plain arrays of ``FlatForest`` stay
+memory-mapped when loaded with ``joblib.load(..., mmap_mode='r')``.
+
+The arithmetic follows sklearn's: rows are compared as ``float32`` against the
+``float64`` thresholds, leaf values are normalized per tree, and the tree
+probabilities are summed in estimator order before dividing by the number of
+trees.  Predictions are therefore bit-identical to ``clf.predict`` of a forest
+predicting with ``n_jobs=None``; with several threads sklearn sums the trees
+in completion order, so its own last bits can vary.
+
+Replace the model of a saved artifact with its compiled form, which
+``serve.py`` loads unchanged::
+
+    python ect/forest_compiler.py model.joblib model-flat.joblib
+"""
+
+import argparse
+
+import joblib
+import numpy as np
+from sklearn.ensemble import ExtraTreesClassifier, RandomForestClassifier
+
+BATCH_SIZE = 8192
+
+
+class FlatForest:
+    """Vectorized predictor over the flattened trees of a forest.
+
+    Node arrays hold every tree back to back; ``roots`` and ``depths`` give
+    the first node and the depth of each tree.
+    """
+
+    def __init__(self, feature, threshold, left, right, leaf, value, roots, depths,
+                 classes, n_features_in):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.leaf = leaf
+        self.value = value
+        self.roots = roots
+        self.depths = depths
+        self.classes_ = classes
+        self.n_features_in_ = n_features_in
+
+    def _leaves(self, flat, n_rows, tree):
+        """Return the leaf reached by each row of the row-major ``flat`` in ``tree``."""
+        node = np.full(n_rows, self.roots[tree], dtype=self.left.dtype)
+        active = np.arange(n_rows)
+        for _ in range(self.depths[tree]):
+            current = node[active]
+            values = flat.take(active * self.n_features_in_ + self.feature[current])
+            current = np.where(values <= self.threshold[current],
+                               self.left[current], self.right[current])
+            node[active] = current
+            active = active[~self.leaf[current]]
+            if not len(active):
+                break
+        return node
+
+    def predict_proba(self, X, batch_size=BATCH_SIZE):
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError('X must have %d features' % self.n_features_in_)
+        if np.isnan(X).any():
+            raise ValueError('X contains NaN')
+        proba = np.empty((len(X), len(self.classes_)))
+        for start in range(0, len(X), batch_size):
+            block = np.ascontiguousarray(X[start:start + batch_size])
+            flat = block.ravel()
+            total = np.zeros((len(block), len(self.classes_)))
+            for tree in range(len(self.roots)):
+                total += self.value[self._leaves(flat, len(block), tree)]
+            total /= len(self.roots)
+            proba[start:start + len(block)] = total
+        return proba
+
+    def predict(self, X):
+        return self.classes_.take(np.argmax(self.predict_proba(X), axis=1), axis=0)
+
+
+def is_compilable(clf):
+    """True if ``compile_forest`` accepts ``clf``."""
+    return (isinstance(clf, (RandomForestClassifier, ExtraTreesClassifier))
+            and getattr(clf, 'n_outputs_', 1) == 1)
+
+
+def compile_forest(clf):
+    """Return a ``FlatForest`` equivalent to the fitted single-output forest ``clf``."""
+    if getattr(clf, 'n_outputs_', 1) != 1:
+        raise ValueError('only single-output forests can be compiled')
+    features, thresholds, lefts, rights, leaves, values = [], [], [], [], [], []
+    roots, depths = [], []
+    offset = 0
+    for estimator in clf.estimators_:
+        tree = estimator.tree_
+        leaf = tree.children_left < 0
+        ids = np.arange(tree.node_count)
+        features.append(np.where(leaf, 0, tree.feature))
+        thresholds.append(tree.threshold)
+        lefts.append(np.where(leaf, ids, tree.children_left) + offset)
+        rights.append(np.where(leaf, ids, tree.children_right) + offset)
+        leaves.append(leaf)
+        # Normalized the way DecisionTreeClassifier.predict_proba does it.
+        value = tree.value[:, 0, :len(clf.classes_)].astype(np.float64)
+        normalizer = value.sum(axis=1, keepdims=True)
+        normalizer[normalizer == 0.0] = 1.0
+        values.append(value / normalizer)
+        roots.append(offset)
+        depths.append(tree.max_depth)
+        offset += tree.node_count
+    index = np.int32 if offset < np.iinfo(np.int32).max else np.int64
+    return FlatForest(
+        feature=np.concatenate(features).astype(np.intp),
+        threshold=np.concatenate(thresholds).astype(np.float64),
+        left=np.concatenate(lefts).astype(index),
+        right=np.concatenate(rights).astype(index),
+        leaf=np.concatenate(leaves),
+        value=np.concatenate(values),
+        roots=np.array(roots, dtype=index),
+        depths=np.array(depths, dtype=np.intp),
+        classes=clf.classes_,
+        n_features_in=clf.n_features_in_,
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Compile the forest of a saved model.')
+    parser.add_argument('model', help='artifact written by score.py train')
+    parser.add_argument('output')
+    args = parser.parse_args(argv)
+
+    # Run as a script this module is __main__; pickle the class from the
+    # importable module so that score.py and serve.py can load the artifact.
+    import forest_compiler
+
+    artifact = joblib.load(args.model)
+    artifact['model'] = forest_compiler.compile_forest(artifact['model'])
+    joblib.dump(artifact, args.output)
+    print('saved %s' % args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,185 @@
+"""Stage-level timing instrumentation.
+
+Wrap a pipeline stage in ``stage(name)`` (or decorate a function with
+``instrument(name)``) to record its wall time, CPU time, rows processed and
+resident-memory change::
+
+    with stage('load') as s:
+        df = pd.read_csv(path)
+        s.rows = len(df)
+
+Nothing is recorded until ``enable()`` is called.  While disabled ``stage``
+returns one shared no-op object, so the cost is a global lookup and a call.
+Records can be exported as JSON or in the Prometheus text format.
+"""
+
+import functools
+import json
+import os
+import resource
+import sys
+import time
+
+_recorder = None
+
+
+def _rss():
+    """Return the current resident set size in bytes."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        # Peak rather than current RSS; kilobytes on Linux, bytes on macOS.
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return maxrss if sys.platform == 'darwin' else maxrss * 1024
+
+
+class Recorder:
+    """Collects one record per finished stage."""
+
+    def __init__(self):
+        self.records = []
+
+    def add(self, record):
+        self.records.append(record)
+
+    def extend(self, records):
+        self.records.extend(records)
+
+    def to_json(self, **kwargs):
+        return json.dumps(self.records, **kwargs)
+
+    def to_prometheus(self, prefix='breast_cancer_stage'):
+        """Return the totals per stage in the Prometheus text exposition format."""
+        totals = {}
+        for record in self.records:
+            total = totals.setdefault(record['stage'], {
+                'count': 0, 'wall_seconds': 0.0, 'cpu_seconds': 0.0,
+                'rows': 0, 'memory_delta_bytes': 0})
+            total['count'] += 1
+            total['wall_seconds'] += record['wall_seconds']
+            total['cpu_seconds'] += record['cpu_seconds']
+            total['rows'] += record['rows'] or 0
+            total['memory_delta_bytes'] += record['memory_delta_bytes']
+
+        # Counter names end in _total, as Prometheus expects.
+        metrics = [
+            ('count', 'runs_total', 'counter', 'Number of times the stage ran.'),
+            ('wall_seconds', 'wall_seconds_total', 'counter',
+             'Wall-clock seconds spent in the stage.'),
+            ('cpu_seconds', 'cpu_seconds_total', 'counter', 'Process CPU seconds spent in the stage.'),
+            ('rows', 'rows_total', 'counter', 'Rows processed by the stage.'),
+            ('memory_delta_bytes', 'memory_delta_bytes', 'gauge',
+             'Change in resident memory across the stage.'),
+        ]
+        lines = []
+        for key, metric, kind, help_text in metrics:
+            name = '%s_%s' % (prefix, metric)
+            lines.append('# HELP %s %s' % (name, help_text))
+            lines.append('# TYPE %s %s' % (name, kind))
+            for stage_name, total in totals.items():
+                label = stage_name.replace('\\', '\\\\').replace('"', '\\"')
+                lines.append('%s{stage="%s"} %s' % (name, label, total[key]))
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path):
+        """Write the records to ``path``; ``.prom`` files get the Prometheus format."""
+        with open(path, 'w') as f:
+            if path.endswith('.prom'):
+                f.write(self.to_prometheus())
+            else:
+                f.write(self.to_json(indent=2))
+
+
+class Stage:
+    """Context manager timing one run of a stage into a ``Recorder``."""
+
+    def __init__(self, recorder, name, rows=None):
+        self.recorder = recorder
+        self.name = name
+        self.rows = rows
+
+    def __enter__(self):
+        self._rss = _rss()
+        self._cpu = time.process_time()
+        self._wall = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        wall = time.perf_counter() - self._wall
+        cpu = time.process_time() - self._cpu
+        self.recorder.add({
+            'stage': self.name,
+            'wall_seconds': wall,
+            'cpu_seconds': cpu,
+            'rows': self.rows,
+            'memory_delta_bytes': _rss() - self._rss,
+            'failed': exc_type is not None,
+        })
+        return False
+
+
+class _NullStage:
+    rows = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def __setattr__(self, name, value):
+        # Ignore ``s.rows = ...`` so callers need not check whether
+        # instrumentation is enabled.
+        pass
+
+
+_NULL_STAGE = _NullStage()
+
+
+def enable(recorder=None):
+    """Start recording stages into ``recorder`` (a new one by default) and return it."""
+    global _recorder
+    _recorder = recorder if recorder is not None else Recorder()
+    return _recorder
+
+
+def disable():
+    """Stop recording and return the recorder that was active, if any."""
+    global _recorder
+    recorder, _recorder = _recorder, None
+    return recorder
+
+
+def enabled():
+    return _recorder is not None
+
+
+def get_recorder():
+    return _recorder
+
+
+def stage(name, rows=None):
+    """Return a context manager that records stage ``name`` when enabled."""
+    if _recorder is None:
+        return _NULL_STAGE
+    return Stage(_recorder, name, rows)
+
+
+def instrument(name=None):
+    """Decorate a function so each call is recorded as a stage.
+
+    ``rows`` is taken from ``len()`` of the first argument when it has one.
+    """
+    def decorator(func):
+        stage_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _recorder is None:
+                return func(*args, **kwargs)
+            rows = len(args[0]) if args and hasattr(args[0], '__len__') else None
+            with Stage(_recorder, stage_name, rows):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
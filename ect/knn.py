@@ -0,0 +1,129 @@
+"""Nearest-neighbour classifier indexed on the distinct feature vectors.
+
+Every feature is a small integer (a 1-10 cytology score, the class, a doctor
+flag), so a growing case archive mostly repeats vectors it has already seen.
+``GridKNeighborsClassifier`` collapses the training rows into one bucket per
+distinct vector, holding the class counts of its rows, and builds a KD-tree
+over the buckets.  Query cost then grows with the number of distinct vectors
+rather than with the number of stored cases, and each distinct query vector in
+a batch is looked up once.
+
+The ``k`` nearest rows are gathered from the nearest buckets in distance
+order.  When the last bucket needed holds more rows than are still needed, it
+contributes its class counts pro rata instead of an arbitrary subset of its
+rows; ``KNeighborsClassifier`` breaks such distance ties arbitrarily too, so
+predictions can differ from it only on those ties.
+"""
+
+import numpy as np
+import scipy.sparse as sp
+from sklearn.base import BaseEstimator, ClassifierMixin
+from sklearn.neighbors import KDTree
+from sklearn.utils.validation import check_is_fitted
+
+BATCH_SIZE = 65536
+
+
+def _as_numeric(X):
+    """Return ``X`` as a CSR matrix or a numeric array.
+
+    A frame mixing bool and float columns, like the notebook's ``X_train``,
+    becomes an object array under ``np.asarray``; such input is cast to
+    ``float64`` so its rows can be viewed as raw bytes.
+    """
+    if sp.issparse(X):
+        return X.tocsr()
+    X = np.asarray(X)
+    if X.dtype.kind not in 'biuf':
+        X = X.astype(np.float64)
+    return X
+
+
+def _blocks(X, batch_size=BATCH_SIZE):
+    for start in range(0, X.shape[0], batch_size):
+        block = X[start:start + batch_size]
+        yield start, np.ascontiguousarray(block.toarray() if sp.issparse(block) else block)
+
+
+def _row_keys(block):
+    # View each row as one opaque scalar so np.unique compares whole rows.
+    return block.view(np.dtype((np.void, block.dtype.itemsize * block.shape[1]))).ravel()
+
+
+def _distinct_rows(block):
+    """Return ``(unique_rows, inverse)`` of a C-contiguous 2-D array."""
+    _, first, inverse = np.unique(_row_keys(block), return_index=True, return_inverse=True)
+    return block[first], inverse.ravel()
+
+
+class GridKNeighborsClassifier(BaseEstimator, ClassifierMixin):
+    """k-nearest neighbours (Euclidean) over buckets of identical feature vectors.
+
+    Parameters
+    ----------
+    n_neighbors : int
+        Number of training rows that vote, as in ``KNeighborsClassifier``.
+    weights : {'uniform', 'distance'}
+        Vote weighting, as in ``KNeighborsClassifier``.
+    leaf_size : int
+        Leaf size of the KD-tree over the distinct training vectors.
+    """
+
+    def __init__(self, n_neighbors=5, weights='uniform', leaf_size=40):
+        self.n_neighbors = n_neighbors
+        self.weights = weights
+        self.leaf_size = leaf_size
+
+    def fit(self, X, y):
+        if self.weights not in ('uniform', 'distance'):
+            raise ValueError("weights must be 'uniform' or 'distance'")
+        self.classes_, y = np.unique(np.asarray(y), return_inverse=True)
+        n_classes = len(self.classes_)
+        vectors = []
+        counts = []
+        for start, block in _blocks(_as_numeric(X)):
+            rows, inverse = _distinct_rows(block)
+            labels = y[start:start + len(block)]
+            vectors.append(rows)
+            counts.append(np.bincount(inverse * n_classes + labels,
+                                      minlength=len(rows) * n_classes).reshape(-1, n_classes))
+        # Buckets from different row blocks may hold the same vector.
+        vectors, inverse = _distinct_rows(np.ascontiguousarray(np.vstack(vectors)))
+        self.counts_ = np.zeros((len(vectors), n_classes), dtype=np.int64)
+        np.add.at(self.counts_, inverse, np.vstack(counts))
+        self.vectors_ = vectors
+        self.n_features_in_ = vectors.shape[1]
+        self.tree_ = KDTree(vectors.astype(np.float64), leaf_size=self.leaf_size)
+        return self
+
+    def _votes(self, queries):
+        """Return the (possibly fractional) class votes of each query row."""
+        k = self.n_neighbors
+        n_buckets = min(k, len(self.vectors_))
+        distances, nearest = self.tree_.query(queries.astype(np.float64), k=n_buckets)
+        counts = self.counts_[nearest]                      # (queries, buckets, classes)
+        size = counts.sum(axis=2)
+        before = np.cumsum(size, axis=1) - size
+        weight = np.clip(k - before, 0, size) / size
+        if self.weights == 'distance':
+            # As in KNeighborsClassifier, exact matches outvote everything else.
+            exact = distances == 0
+            with np.errstate(divide='ignore'):
+                inverse = 1.0 / distances
+            weight = weight * np.where(exact.any(axis=1, keepdims=True), exact, inverse)
+        return (counts * weight[:, :, None]).sum(axis=1)
+
+    def predict_proba(self, X):
+        check_is_fitted(self, 'tree_')
+        proba = []
+        for _, block in _blocks(_as_numeric(X)):
+            rows, inverse = _distinct_rows(block)
+            votes = self._votes(rows)
+            proba.append((votes / votes.sum(axis=1, keepdims=True))[inverse])
+        if not proba:
+            return np.empty((0, len(self.classes_)))
+        return np.vstack(proba)
+
+    def predict(self, X):
+        # argmax picks the first class on a tied vote, like KNeighborsClassifier.
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
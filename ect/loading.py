@@ -0,0 +1,137 @@
+"""Chunked, typed loading of the breast cancer CSV.
+
+The notebook reads the whole file with ``pd.read_csv`` and lets pandas guess
+the dtypes, so ``bare_nuclei`` arrives as ``object`` (it contains ``?``) and is
+only coerced much later.  For patient extracts that do not fit in memory we
+read fixed-size chunks with an explicit schema instead and yield each chunk
+already cleaned the same way the notebook cleans the full frame.
+"""
+
+import numpy as np
+import pandas as pd
+
+from dedup import Deduplicator
+
+DATA_PATH = 'data/breast_cancer_data.csv'
+CHUNKSIZE = 100000
+
+# The nine cytology scores, all integers between 1 and 10.
+SCORE_COLUMNS = [
+    'clump_thickness',
+    'cell_size_uniformity',
+    'cell_shape_uniformity',
+    'marginal_adhesion',
+    'single_ep_cell_size',
+    'bare_nuclei',
+    'bland_chromatin',
+    'normal_nucleoli',
+    'mitoses',
+]
+
+SCORE_RANGE = (1, 10)
+
+CLASS_CATEGORIES = ['benign', 'malignant']
+
+# Scores are parsed as float32 because the raw file contains blanks which an
+# integer column cannot hold; they are narrowed to uint8 once the incomplete
+# rows are dropped in ``clean_chunk``.  ``bare_nuclei`` is read as text, as the
+# notebook does: a ``?`` there is a value, not a missing one, until after the
+# duplicates are dropped.
+RAW_DTYPES = dict(
+    {'patient_id': 'int32',
+     'class': pd.CategoricalDtype(CLASS_CATEGORIES),
+     'doctor_name': 'category'},
+    **{column: 'object' if column == 'bare_nuclei' else 'float32'
+       for column in SCORE_COLUMNS}
+)
+
+CLEAN_DTYPES = {column: 'uint8' for column in SCORE_COLUMNS}
+
+
+def valid_scores(values):
+    """Return a mask of which ``values`` are whole numbers within ``SCORE_RANGE``.
+
+    Anything else would wrap or truncate silently when cast to ``uint8``.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    low, high = SCORE_RANGE
+    with np.errstate(invalid='ignore'):
+        return (values >= low) & (values <= high) & (values == np.floor(values))
+
+NA_VALUES = {column: ['?'] for column in SCORE_COLUMNS if column != 'bare_nuclei'}
+
+
+def read_chunks(path=DATA_PATH, chunksize=CHUNKSIZE, doctors=None):
+    """Yield raw typed chunks of ``path``.
+
+    ``doctors`` fixes the ``doctor_name`` categories so that every chunk shares
+    the same vocabulary; by default each chunk infers its own.
+    """
+    dtypes = dict(RAW_DTYPES)
+    if doctors is not None:
+        dtypes['doctor_name'] = pd.CategoricalDtype(doctors)
+    reader = pd.read_csv(path,
+                         usecols=list(dtypes),
+                         dtype=dtypes,
+                         na_values=NA_VALUES,
+                         chunksize=chunksize)
+    for chunk in reader:
+        yield chunk
+
+
+def clean_chunk(chunk, dedup=None):
+    """Apply the notebook cleaning steps to a single chunk.
+
+    Rows with a missing value are dropped, duplicate ``patient_id`` rows keep
+    the first occurrence, and rows whose ``bare_nuclei`` was not a number are
+    dropped last, mirroring the order of the notebook cells.  So a ``?`` row
+    still claims its patient id, while a blank one does not.  Rows with a
+    score that is not a whole number in ``SCORE_RANGE`` are dropped with the
+    non-numeric ones rather than wrapped into ``uint8``.  ``dedup`` is a
+    ``Deduplicator`` shared between chunks so that duplicates are also removed
+    across chunks; without one only duplicates within the chunk are removed.
+    """
+    chunk = chunk.dropna()
+    if dedup is None:
+        chunk = chunk[~chunk['patient_id'].duplicated(keep='first')]
+    else:
+        chunk = dedup.filter(chunk)
+    chunk = chunk.assign(bare_nuclei=pd.to_numeric(chunk['bare_nuclei'], errors='coerce'))
+    chunk = chunk.dropna(subset=['bare_nuclei'])
+    chunk = chunk[valid_scores(chunk[SCORE_COLUMNS]).all(axis=1)]
+    return chunk.astype(CLEAN_DTYPES)
+
+
+def iter_clean_chunks(path=DATA_PATH, chunksize=CHUNKSIZE, doctors=None, dedup=None):
+    """Yield cleaned chunks of ``path`` with duplicates removed across chunks.
+
+    Pass the same ``dedup`` to several calls to deduplicate across files.
+    """
+    if dedup is None:
+        dedup = Deduplicator()
+    for chunk in read_chunks(path, chunksize=chunksize, doctors=doctors):
+        chunk = clean_chunk(chunk, dedup)
+        if len(chunk):
+            yield chunk
+
+
+def load(path=DATA_PATH, chunksize=CHUNKSIZE, doctors=None):
+    """Load and clean the whole of ``path`` into one frame."""
+    if doctors is None:
+        doctors = doctor_names(path, chunksize=chunksize)
+    chunks = list(iter_clean_chunks(path, chunksize=chunksize, doctors=doctors))
+    if not chunks:
+        return pd.DataFrame(columns=list(RAW_DTYPES)).astype(RAW_DTYPES)
+    return pd.concat(chunks, ignore_index=True)
+
+
+def doctor_names(path=DATA_PATH, chunksize=CHUNKSIZE):
+    """Return the sorted doctor names found in ``path``."""
+    names = set()
+    reader = pd.read_csv(path,
+                         usecols=['doctor_name'],
+                         dtype={'doctor_name': 'category'},
+                         chunksize=chunksize)
+    for chunk in reader:
+        names.update(chunk['doctor_name'].dropna().cat.categories)
+    return sorted(names)
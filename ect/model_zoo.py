@@ -0,0 +1,165 @@
+"""The nine classifiers compared in the notebook, trained in parallel.
+
+``compare_models`` dispatches every candidate to a joblib worker.  The feature
+matrices are converted to NumPy arrays first so that joblib memory-maps them
+read-only into the workers instead of pickling a copy per task, and the fitted
+estimators are returned so they can be reused (for the confusion matrix or the
+submission) rather than refitted.
+
+The feature matrix may also be a ``scipy.sparse`` matrix, as produced by
+``BreastCancerPreprocessor.feature_matrix(frame, sparse=True)``.  It is kept
+sparse for every estimator that accepts sparse input; Gaussian Naive Bayes,
+which does not, is wrapped in ``DenseBatches`` so that only one block of rows
+is densified at a time.
+
+``KNN`` is ``knn.GridKNeighborsClassifier``, which indexes the distinct
+feature vectors instead of every stored case.
+"""
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from joblib import Parallel, delayed
+from sklearn.base import BaseEstimator, ClassifierMixin, clone
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression, Perceptron, SGDClassifier
+from sklearn.naive_bayes import GaussianNB
+from sklearn.svm import SVC, LinearSVC
+from sklearn.tree import DecisionTreeClassifier
+
+from instrumentation import Recorder, Stage, get_recorder
+from knn import GridKNeighborsClassifier
+
+# Model name -> factory, in the order of the notebook's comparison table.
+MODELS = {
+    'Logistic Regression': lambda: LogisticRegression(),
+    'Support Vector Machines': lambda: SVC(),
+    'Linear SVC': lambda: LinearSVC(),
+    'KNN': lambda: GridKNeighborsClassifier(n_neighbors=3),
+    'Decision Tree': lambda: DecisionTreeClassifier(),
+    'Random Forest': lambda: RandomForestClassifier(n_estimators=100),
+    'Naive Bayes': lambda: GaussianNB(),
+    'Perceptron': lambda: Perceptron(max_iter=5, tol=None),
+    'Stochastic Gradient Decent': lambda: SGDClassifier(max_iter=5, tol=None),
+}
+
+
+# Models whose estimator cannot take a sparse matrix directly.
+DENSE_ONLY = {'Naive Bayes'}
+
+BATCH_SIZE = 65536
+
+
+class DenseBatches(BaseEstimator, ClassifierMixin):
+    """Run an estimator that needs dense input over sparse input in row blocks.
+
+    ``fit`` feeds ``batch_size`` rows at a time, densified, to the wrapped
+    estimator's ``partial_fit``; ``predict`` and ``predict_proba`` densify
+    the same way.  Peak memory is one dense block rather than the full matrix.
+    """
+
+    def __init__(self, estimator, batch_size=BATCH_SIZE):
+        self.estimator = estimator
+        self.batch_size = batch_size
+
+    def _batches(self, X):
+        for start in range(0, X.shape[0], self.batch_size):
+            block = X[start:start + self.batch_size]
+            yield start, block.toarray() if sp.issparse(block) else np.asarray(block)
+
+    def fit(self, X, y):
+        y = np.asarray(y)
+        self.classes_ = np.unique(y)
+        self.estimator_ = clone(self.estimator)
+        for start, block in self._batches(X):
+            self.estimator_.partial_fit(block, y[start:start + self.batch_size],
+                                        classes=self.classes_)
+        return self
+
+    def predict(self, X):
+        return np.concatenate([self.estimator_.predict(block) for _, block in self._batches(X)])
+
+    def predict_proba(self, X):
+        return np.vstack([self.estimator_.predict_proba(block) for _, block in self._batches(X)])
+
+
+def make_models(names=None, sparse=False, random_state=None):
+    """Return fresh, unfitted estimators keyed by model name.
+
+    With ``sparse`` the dense-only models are wrapped in ``DenseBatches``.
+    ``random_state`` seeds every estimator that takes one, so that repeated
+    runs fit identical models.
+    """
+    if names is None:
+        names = list(MODELS)
+    models = {name: MODELS[name]() for name in names}
+    if random_state is not None:
+        for estimator in models.values():
+            if 'random_state' in estimator.get_params():
+                estimator.set_params(random_state=random_state)
+    if sparse:
+        for name in DENSE_ONLY.intersection(models):
+            models[name] = DenseBatches(models[name])
+    return models
+
+
+def as_matrix(X):
+    """Return ``X`` as a CSR matrix if it is sparse, else as a NumPy array."""
+    if sp.issparse(X):
+        return X.tocsr()
+    return np.asarray(X)
+
+
+def _fit_and_score(name, estimator, X_train, y_train, X_test):
+    # Runs in a worker process, so fit and predict are recorded into a local
+    # Recorder and the records are handed back to the parent.
+    recorder = Recorder()
+    with Stage(recorder, 'fit:%s' % name, X_train.shape[0]):
+        estimator.fit(X_train, y_train)
+    fit_time = recorder.records[-1]['wall_seconds']
+    score = round(estimator.score(X_train, y_train) * 100, 2)
+    y_pred = None
+    if X_test is not None:
+        with Stage(recorder, 'predict:%s' % name, X_test.shape[0]):
+            y_pred = estimator.predict(X_test)
+    return name, estimator, score, fit_time, y_pred, recorder.records
+
+
+def compare_models(X_train, y_train, X_test=None, names=None, n_jobs=-1,
+                   max_nbytes='1M', random_state=None):
+    """Fit every model in parallel and build the comparison table.
+
+    Returns ``(models, fitted, predictions)`` where ``models`` is the score
+    table sorted like ``models.sort_values(by='Score')`` in the notebook,
+    ``fitted`` maps model names to fitted estimators and ``predictions`` maps
+    them to predictions on ``X_test`` (empty when ``X_test`` is None).
+
+    Arrays larger than ``max_nbytes`` (including the arrays backing a sparse
+    matrix) are memory-mapped into the workers.  ``random_state`` is passed to
+    ``make_models``.
+    """
+    X_train = as_matrix(X_train)
+    y_train = np.asarray(y_train)
+    if X_test is not None:
+        X_test = as_matrix(X_test)
+
+    models = make_models(names, sparse=sp.issparse(X_train), random_state=random_state)
+    results = Parallel(n_jobs=n_jobs, max_nbytes=max_nbytes, mmap_mode='r')(
+        delayed(_fit_and_score)(name, estimator, X_train, y_train, X_test)
+        for name, estimator in models.items()
+    )
+
+    fitted = {}
+    predictions = {}
+    rows = []
+    recorder = get_recorder()
+    for name, estimator, score, fit_time, y_pred, records in results:
+        if recorder is not None:
+            recorder.extend(records)
+        fitted[name] = estimator
+        if y_pred is not None:
+            predictions[name] = y_pred
+        rows.append({'Model': name, 'Score': score, 'Fit Seconds': fit_time})
+
+    models = pd.DataFrame(rows).sort_values(by='Score', ascending=False)
+    return models, fitted, predictions
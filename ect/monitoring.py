@@ -0,0 +1,157 @@
+"""Streaming, mergeable prediction metrics for monitoring live traffic.
+
+The notebook computes ``confusion_matrix(y_train, y_pred)`` over a fully
+materialized prediction array and normalizes it into ``cnf_matrix_percent``.
+``MetricsAccumulator`` keeps only a 2x2 confusion matrix per doctor, updated
+with one ``np.bincount`` per batch, so its memory does not grow with the
+number of predictions.  Accumulators built in separate processes merge by
+addition, and ``snapshot`` derives accuracy, precision and recall on the
+positive label (1) from the counts at any time.
+
+Run from the repository root to monitor a saved model on labelled extracts::
+
+    python ect/monitoring.py --model model.joblib day-1.csv day-2.csv
+"""
+
+import argparse
+import json
+
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+
+from dedup import Deduplicator
+from loading import CHUNKSIZE, read_chunks
+from score import MODEL_PATH, load_model
+
+UNKNOWN_DOCTOR = '<unknown>'
+
+CLASSES = (0, 1)
+
+
+def _rates(cnf_matrix):
+    (tn, fp), (fn, tp) = cnf_matrix.tolist()
+    rows = tn + fp + fn + tp
+    return {
+        'rows': rows,
+        'confusion': [[tn, fp], [fn, tp]],
+        'accuracy': (tp + tn) / rows if rows else None,
+        'precision': tp / (tp + fp) if tp + fp else None,
+        'recall': tp / (tp + fn) if tp + fn else None,
+    }
+
+
+class MetricsAccumulator:
+    """Mergeable confusion counts, overall and per doctor.
+
+    Parameters
+    ----------
+    doctors : list of str
+        Doctor vocabulary of the preprocessor; ``update`` takes the matching
+        ``doctor_code`` column.  Code -1 (a doctor not in the vocabulary) is
+        counted under ``UNKNOWN_DOCTOR``.
+    """
+
+    def __init__(self, doctors=()):
+        self.doctors = list(doctors)
+        # counts[doctor, true label, predicted label]; the last doctor row
+        # holds the unknown doctors.
+        self.counts = np.zeros((len(self.doctors) + 1, 2, 2), dtype=np.int64)
+
+    def update(self, y_true, y_pred, doctor_code=None):
+        """Add a batch of binary labels and predictions and return the accumulator.
+
+        Raises ValueError if a label is not 0 or 1 or a doctor code is past
+        the end of the vocabulary, rather than counting it in another cell.
+        """
+        y_true = np.asarray(y_true)
+        y_pred = np.asarray(y_pred)
+        for labels in (y_true, y_pred):
+            if not np.isin(labels, CLASSES).all():
+                raise ValueError('labels must be 0 or 1')
+        codes = 2 * y_true.astype(np.intp) + y_pred.astype(np.intp)
+        if doctor_code is None:
+            doctor = np.full(len(codes), len(self.doctors), dtype=np.intp)
+        else:
+            doctor = np.asarray(doctor_code, dtype=np.intp)
+            if len(doctor) and doctor.max() >= len(self.doctors):
+                raise ValueError('doctor codes must be below %d' % len(self.doctors))
+            doctor = np.where(doctor < 0, len(self.doctors), doctor)
+        self.counts += np.bincount(4 * doctor + codes,
+                                   minlength=self.counts.size).reshape(self.counts.shape)
+        return self
+
+    def merge(self, other):
+        """Add the counts of ``other`` to this accumulator and return it."""
+        if other.doctors != self.doctors:
+            raise ValueError('cannot merge accumulators with different doctor vocabularies')
+        self.counts += other.counts
+        return self
+
+    @property
+    def confusion(self):
+        """The overall 2x2 confusion matrix (rows are true labels)."""
+        return self.counts.sum(axis=0)
+
+    def confusion_percent(self):
+        """The confusion matrix normalized per true label, as ``cnf_matrix_percent``."""
+        cnf_matrix = self.confusion
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return cnf_matrix.astype('float') / cnf_matrix.sum(axis=1)[:, None]
+
+    def snapshot(self):
+        """Return the current overall and per-doctor metrics as a dict."""
+        result = _rates(self.confusion)
+        result['per_doctor'] = {
+            doctor: _rates(cnf_matrix)
+            for doctor, cnf_matrix in zip(self.doctors + [UNKNOWN_DOCTOR], self.counts)
+            if cnf_matrix.any()
+        }
+        return result
+
+    def to_frame(self):
+        """Return the per-doctor metrics as a DataFrame, one row per doctor seen."""
+        rows = [dict(rates, doctor=doctor)
+                for doctor, rates in self.snapshot()['per_doctor'].items()]
+        frame = pd.DataFrame(rows, columns=['doctor', 'rows', 'accuracy', 'precision', 'recall'])
+        return frame.sort_values('rows', ascending=False, ignore_index=True)
+
+
+def monitor_file(path, model_path=MODEL_PATH, chunksize=CHUNKSIZE):
+    """Return the ``MetricsAccumulator`` of the saved model on labelled ``path``."""
+    preprocessor, clf = load_model(model_path)
+    metrics = MetricsAccumulator(preprocessor.doctors_)
+    dedup = Deduplicator()
+    for chunk in read_chunks(path, chunksize=chunksize):
+        frame = preprocessor.transform_frame(chunk, dedup=dedup)
+        if len(frame):
+            metrics.update(frame['cell_type_label'].to_numpy(),
+                           clf.predict(preprocessor.feature_matrix(frame)),
+                           frame['doctor_code'].to_numpy())
+    return metrics
+
+
+def monitor_files(paths, model_path=MODEL_PATH, n_jobs=-1, chunksize=CHUNKSIZE):
+    """Monitor every file in ``paths`` in parallel and return the merged accumulator."""
+    results = Parallel(n_jobs=n_jobs)(
+        delayed(monitor_file)(path, model_path, chunksize) for path in paths)
+    metrics = results[0]
+    for other in results[1:]:
+        metrics.merge(other)
+    return metrics
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Monitor a saved model on labelled extracts.')
+    parser.add_argument('inputs', nargs='+')
+    parser.add_argument('--model', default=MODEL_PATH,
+                        help='model file, or a registry version directory')
+    parser.add_argument('--n-jobs', type=int, default=-1)
+    parser.add_argument('--chunksize', type=int, default=CHUNKSIZE)
+    args = parser.parse_args(argv)
+    metrics = monitor_files(args.inputs, args.model, args.n_jobs, args.chunksize)
+    print(json.dumps(metrics.snapshot(), indent=2))
+
+
+if __name__ == '__main__':
+    main()
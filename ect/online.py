@@ -0,0 +1,183 @@
+"""Incremental training with ``partial_fit`` on new labelled cases.
+
+Three of the notebook's models can learn incrementally: Stochastic Gradient
+Descent, the Perceptron and Gaussian Naive Bayes.  ``OnlineTrainer`` streams
+labelled chunks through the fitted preprocessing and the model's
+``partial_fit``, and checkpoints after every chunk.  The checkpoint has the
+same layout as the ``score.py train`` artifact, so ``score.py`` and
+``serve.py`` can load it directly; it is written to a temporary file and
+renamed into place, so a reader always sees a complete model.
+
+Patients already seen are skipped if they appear again in a later batch,
+with the keep-first rule of the notebook: the first complete row of a patient
+claims the id even if its ``bare_nuclei`` is not a number and the row is not
+trained on.  The seen ids are not part of the checkpoint, which would make
+every write grow with the whole history.  Each checkpoint appends only the ids
+first seen since the previous one, as one ``.npy`` file in the
+``<checkpoint>.ids`` directory, and records how many of those files it covers.
+The doctor vocabulary is fixed by the first batch; doctors first seen later
+get an all-zero one-hot row.
+
+Run from the repository root::
+
+    python ect/online.py --checkpoint model.joblib --model "Naive Bayes" day-1.csv
+    python ect/online.py --checkpoint model.joblib day-2.csv day-3.csv
+"""
+
+import argparse
+import os
+import tempfile
+
+import joblib
+import numpy as np
+
+from dedup import Deduplicator, PatientIdIndex
+from instrumentation import stage
+from loading import CHUNKSIZE, read_chunks
+from model_zoo import MODELS
+from preprocessing import BreastCancerPreprocessor
+from score import MODEL_PATH
+
+ONLINE_MODELS = ('Stochastic Gradient Decent', 'Perceptron', 'Naive Bayes')
+
+CLASSES = np.array([0, 1])
+
+
+class OnlineTrainer:
+    """Keep a model up to date with ``partial_fit`` and checkpoint it.
+
+    Parameters
+    ----------
+    preprocessor : BreastCancerPreprocessor
+        Fitted preprocessing; its doctor vocabulary fixes the feature layout.
+    model : str
+        One of ``ONLINE_MODELS``.
+    checkpoint : str
+        Where the model is saved after every batch.
+    """
+
+    def __init__(self, preprocessor, model='Stochastic Gradient Decent', checkpoint=MODEL_PATH):
+        if model not in ONLINE_MODELS:
+            raise ValueError('model must be one of %s' % ', '.join(ONLINE_MODELS))
+        self.preprocessor = preprocessor
+        self.name = model
+        self.model = MODELS[model]()
+        self.checkpoint = checkpoint
+        self.dedup = Deduplicator()
+        self.batches = 0
+        self.rows = 0
+        # Number of id files the last checkpoint covers, and the ids seen
+        # since then.
+        self.id_runs = 0
+        self._unsaved = []
+
+    @property
+    def ids_dir(self):
+        return self.checkpoint + '.ids'
+
+    def _ids_path(self, run):
+        return os.path.join(self.ids_dir, '%08d.npy' % run)
+
+    @classmethod
+    def resume(cls, checkpoint=MODEL_PATH):
+        """Return a trainer continuing from the model saved at ``checkpoint``."""
+        artifact = joblib.load(checkpoint)
+        if 'name' not in artifact:
+            raise ValueError('%s was not written by OnlineTrainer' % checkpoint)
+        trainer = cls(artifact['preprocessor'], artifact['name'], checkpoint)
+        trainer.model = artifact['model']
+        trainer.batches = artifact['batches']
+        trainer.rows = artifact['rows']
+        # Files past ``id_runs`` were written by a checkpoint that never
+        # completed; they are ignored and later overwritten.
+        trainer.id_runs = artifact['id_runs']
+        index = PatientIdIndex()
+        for run in range(trainer.id_runs):
+            index.add(np.load(trainer._ids_path(run)))
+        trainer.dedup = Deduplicator(index)
+        return trainer
+
+    def partial_fit(self, chunk):
+        """Train on one raw labelled chunk and checkpoint; return the rows used."""
+        frame = self.preprocessor.transform_frame(chunk, dedup=self.dedup)
+        if len(self.dedup.kept):
+            self._unsaved.append(self.dedup.kept)
+        if not len(frame):
+            return 0
+        X = self.preprocessor.feature_matrix(frame)
+        y = frame['cell_type_label'].to_numpy()
+        with stage('partial_fit:%s' % self.name, rows=len(X)):
+            self.model.partial_fit(X, y, classes=CLASSES)
+        self.batches += 1
+        self.rows += len(X)
+        self.save()
+        return len(X)
+
+    def fit_files(self, paths, chunksize=CHUNKSIZE):
+        """Stream every CSV in ``paths`` through ``partial_fit``."""
+        for path in paths:
+            for chunk in read_chunks(path, chunksize=chunksize):
+                self.partial_fit(chunk)
+        return self
+
+    def _write_ids(self, ids, run):
+        os.makedirs(self.ids_dir, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.ids_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.save(f, ids)
+            os.replace(tmp, self._ids_path(run))
+        except BaseException:
+            os.remove(tmp)
+            raise
+
+    def save(self):
+        """Atomically write the checkpoint and the ids seen since the last one."""
+        id_runs = self.id_runs
+        with stage('checkpoint'):
+            if self._unsaved:
+                self._write_ids(np.unique(np.concatenate(self._unsaved)), id_runs)
+                id_runs += 1
+            artifact = {
+                'preprocessor': self.preprocessor,
+                'model': self.model,
+                'name': self.name,
+                'id_runs': id_runs,
+                'batches': self.batches,
+                'rows': self.rows,
+            }
+            directory = os.path.dirname(os.path.abspath(self.checkpoint))
+            fd, tmp = tempfile.mkstemp(dir=directory, suffix='.tmp')
+            os.close(fd)
+            try:
+                joblib.dump(artifact, tmp)
+                os.replace(tmp, self.checkpoint)
+            except BaseException:
+                os.remove(tmp)
+                raise
+        self.id_runs = id_runs
+        self._unsaved = []
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Update a model with new labelled cases.')
+    parser.add_argument('inputs', nargs='+')
+    parser.add_argument('--checkpoint', default=MODEL_PATH)
+    parser.add_argument('--model', choices=ONLINE_MODELS, default='Stochastic Gradient Decent',
+                        help='model to start with when there is no checkpoint yet')
+    parser.add_argument('--chunksize', type=int, default=CHUNKSIZE)
+    args = parser.parse_args(argv)
+
+    if os.path.exists(args.checkpoint):
+        trainer = OnlineTrainer.resume(args.checkpoint)
+    else:
+        first = next(read_chunks(args.inputs[0], chunksize=args.chunksize))
+        preprocessor = BreastCancerPreprocessor().fit(first)
+        trainer = OnlineTrainer(preprocessor, args.model, args.checkpoint)
+    trainer.fit_files(args.inputs, args.chunksize)
+    print('%s: %d rows in %d batches, saved %s'
+          % (trainer.name, trainer.rows, trainer.batches, args.checkpoint))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,155 @@
+"""Multi-process batch inference over shared memory.
+
+``clf.predict(X_test)`` runs in one process.  ``predict_parallel`` splits the
+rows into shards and scores them in a process pool, without copying either
+the model or the data into each worker:
+
+- a random forest is compiled into a ``FlatForest`` (see
+  ``forest_compiler.py``) and written once to a temporary file, which every
+  worker loads with ``mmap_mode='r'``.  Its node arrays are plain NumPy
+  arrays, so they stay mapped from the OS page cache and are shared by all
+  workers.  An sklearn forest cannot be shared that way: unpickling a tree
+  copies its arrays, so each worker would hold all of the trees.  Other
+  models are loaded by each worker as they are;
+- the feature matrix is copied once into a ``multiprocessing.shared_memory``
+  block that the workers attach to by name, and each worker writes its
+  predictions into a second shared block at its shard's offset.
+
+Predictions therefore come back in input row order, aligned with the
+``patient_id`` column they are written next to.
+
+Run from the repository root::
+
+    python ect/parallel_inference.py --model model.joblib --workers 8 patients.csv submission.csv
+"""
+
+import argparse
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from dedup import Deduplicator
+from forest_compiler import compile_forest, is_compilable
+from instrumentation import stage
+from loading import CHUNKSIZE, read_chunks
+from score import MODEL_PATH, load_model
+
+SHARD_SIZE = 50000
+
+# Per-worker state set up once by _init_worker.
+_worker = {}
+
+
+def _attach(name, shape, dtype):
+    block = shared_memory.SharedMemory(name=name)
+    return block, np.ndarray(shape, dtype=dtype, buffer=block.buf)
+
+
+def _init_worker(model_path, X_spec, out_spec):
+    _, clf = load_model(model_path, mmap_mode='r')
+    X_block, X = _attach(*X_spec)
+    out_block, out = _attach(*out_spec)
+    # Keep the blocks referenced so their buffers stay valid.
+    _worker.update(clf=clf, X=X, out=out, blocks=(X_block, out_block))
+
+
+def _predict_shard(start, stop):
+    _worker['out'][start:stop] = _worker['clf'].predict(_worker['X'][start:stop])
+    return stop - start
+
+
+def _worker_model(model_path, directory):
+    """Write the model the workers load to ``directory`` and return its path."""
+    preprocessor, clf = load_model(model_path)
+    if is_compilable(clf):
+        clf = compile_forest(clf)
+    path = os.path.join(directory, 'model.joblib')
+    joblib.dump({'preprocessor': preprocessor, 'model': clf}, path)
+    return path
+
+
+def _share(array):
+    block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    shared = np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)
+    shared[...] = array
+    return block, shared
+
+
+def predict_parallel(model_path, X, n_workers=None, shard_size=SHARD_SIZE, out_dtype=np.uint8):
+    """Predict the rows of dense ``X`` with the model saved at ``model_path``.
+
+    Returns the predictions in row order as a new array.
+    """
+    X = np.ascontiguousarray(X)
+    if n_workers is None:
+        n_workers = os.cpu_count() or 1
+    X_block, X_shared = _share(X)
+    out_block, out = _share(np.zeros(len(X), dtype=out_dtype))
+    try:
+        X_spec = (X_block.name, X_shared.shape, X_shared.dtype)
+        out_spec = (out_block.name, out.shape, out.dtype)
+        shards = [(start, min(start + shard_size, len(X)))
+                  for start in range(0, len(X), shard_size)]
+        with tempfile.TemporaryDirectory() as tmp:
+            worker_model = _worker_model(model_path, tmp)
+            with ProcessPoolExecutor(n_workers, initializer=_init_worker,
+                                     initargs=(worker_model, X_spec, out_spec)) as pool:
+                for future in [pool.submit(_predict_shard, *shard) for shard in shards]:
+                    future.result()
+        return out.copy()
+    finally:
+        del X_shared, out
+        for block in (X_block, out_block):
+            block.close()
+            block.unlink()
+
+
+def score_parallel(path, output, model_path=MODEL_PATH, n_workers=None,
+                   shard_size=SHARD_SIZE, chunksize=CHUNKSIZE):
+    """Score ``path`` across ``n_workers`` processes and write the submission.
+
+    Returns the number of rows written.
+    """
+    preprocessor, _ = load_model(model_path)
+    dedup = Deduplicator()
+    ids = []
+    features = []
+    with stage('transform'):
+        for chunk in read_chunks(path, chunksize=chunksize):
+            frame = preprocessor.transform_frame(chunk, dedup=dedup)
+            ids.append(frame['patient_id'].to_numpy())
+            features.append(preprocessor.feature_matrix(frame))
+    patient_id = np.concatenate(ids) if ids else np.empty(0, dtype=np.int64)
+    X = (np.vstack(features) if features
+         else np.empty((0, len(preprocessor.get_feature_names_out())),
+                       dtype=preprocessor.dtype))
+    del features
+
+    with stage('predict', rows=len(X)):
+        y_pred = predict_parallel(model_path, X, n_workers, shard_size)
+    with stage('write_submission', rows=len(X)):
+        pd.DataFrame({'patient_id': patient_id, 'cell_type_label': y_pred}).to_csv(
+            output, index=False)
+    return len(X)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Score a CSV across several processes.')
+    parser.add_argument('input')
+    parser.add_argument('output', nargs='?', default='submission.csv')
+    parser.add_argument('--model', default=MODEL_PATH,
+                        help='model file, or a registry version directory')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--shard-size', type=int, default=SHARD_SIZE)
+    args = parser.parse_args(argv)
+    rows = score_parallel(args.input, args.output, args.model, args.workers, args.shard_size)
+    print('wrote %d rows to %s' % (rows, args.output))
+
+
+if __name__ == '__main__':
+    main()
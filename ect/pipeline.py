@@ -0,0 +1,104 @@
+"""Headless end-to-end run of the notebook: load, preprocess, train, submit.
+
+This is the production counterpart of ``breast-cancer.py``.  It skips every
+EDA table and figure, never imports matplotlib or seaborn, and only builds the
+report (through ``report``) when ``--report`` is given.
+
+Run from the repository root::
+
+    python ect/pipeline.py --output submission.csv
+    python ect/pipeline.py --report report
+    python ect/pipeline.py --precision-report
+"""
+
+import argparse
+
+import pandas as pd
+from sklearn.model_selection import train_test_split
+
+import instrumentation
+from instrumentation import stage
+from evaluation import precision_report
+from loading import DATA_PATH
+from model_zoo import compare_models
+from preprocessing import FEATURE_DTYPES, BreastCancerPreprocessor
+
+PRODUCTION_MODEL = 'Random Forest'
+
+
+def run(path=DATA_PATH, output='submission.csv', test_size=0.2, n_jobs=-1,
+        report=None, random_state=None, sparse=False, dtype='uint8'):
+    """Train the model zoo on ``path`` and write the submission to ``output``.
+
+    ``report`` is a directory to write the EDA figures to, or None to stay
+    headless.  With ``sparse`` the models are trained on a CSR feature matrix,
+    and ``dtype`` is the element type of the feature matrix.  Returns the
+    model comparison table.
+    """
+    with stage('load') as s:
+        raw = pd.read_csv(path)
+        s.rows = len(raw)
+    preprocessor = BreastCancerPreprocessor(dtype=dtype).fit(raw)
+    frame = preprocessor.transform_frame(raw)
+    with stage('split', rows=len(frame)):
+        train, test = train_test_split(frame, test_size=test_size, random_state=random_state)
+
+    models, fitted, predictions = compare_models(
+        preprocessor.feature_matrix(train, sparse=sparse), train['cell_type_label'],
+        preprocessor.feature_matrix(test, sparse=sparse), n_jobs=n_jobs,
+        random_state=random_state)
+
+    submission = pd.DataFrame({
+        'patient_id': test['patient_id'].to_numpy(),
+        'cell_type_label': predictions[PRODUCTION_MODEL],
+    })
+    with stage('write_submission', rows=len(submission)):
+        submission.to_csv(output, index=False)
+
+    if report is not None:
+        import report as eda_report
+        eda_report.build_report(path, report)
+    return models
+
+
+def compare_precisions(path=DATA_PATH, n_jobs=-1, sparse=False, dtypes=FEATURE_DTYPES):
+    """Return ``evaluation.precision_report`` for the features of ``path``."""
+    raw = pd.read_csv(path)
+    preprocessor = BreastCancerPreprocessor().fit(raw)
+    frame = preprocessor.transform_frame(raw)
+    return precision_report(preprocessor.feature_matrix(frame, sparse=sparse),
+                            frame['cell_type_label'], dtypes=dtypes, n_jobs=n_jobs)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run the breast cancer pipeline headless.')
+    parser.add_argument('input', nargs='?', default=DATA_PATH)
+    parser.add_argument('--output', default='submission.csv')
+    parser.add_argument('--test-size', type=float, default=0.2)
+    parser.add_argument('--n-jobs', type=int, default=-1)
+    parser.add_argument('--random-state', type=int, default=None)
+    parser.add_argument('--report', metavar='DIR', default=None,
+                        help='also write the EDA figures to DIR')
+    parser.add_argument('--sparse', action='store_true',
+                        help='train on a sparse feature matrix')
+    parser.add_argument('--dtype', choices=FEATURE_DTYPES, default='uint8',
+                        help='element type of the feature matrix')
+    parser.add_argument('--precision-report', action='store_true',
+                        help='also compare memory and accuracy of each feature dtype per model')
+    parser.add_argument('--metrics', metavar='PATH', default=None,
+                        help='write stage timings to PATH (JSON, or Prometheus text for .prom)')
+    args = parser.parse_args(argv)
+
+    if args.metrics:
+        instrumentation.enable()
+    models = run(args.input, args.output, args.test_size, args.n_jobs,
+                 args.report, args.random_state, args.sparse, args.dtype)
+    print(models.to_string(index=False))
+    if args.precision_report:
+        print(compare_precisions(args.input, args.n_jobs, args.sparse).to_string(index=False))
+    if args.metrics:
+        instrumentation.disable().write(args.metrics)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,146 @@
+"""Memoized predictions keyed on the packed feature vector.
+
+The nine cytology scores are integers 1-10, the class is 0 or 1 and each
+patient has one of a fixed set of doctors, so traffic repeats a small number
+of distinct feature vectors.  ``pack_keys`` packs each row of the model
+feature matrix into one ``int64``: four bits per score and for the class, and
+the index of the doctor's one-hot column (0 for none) above them.
+``CachedPredictor`` keeps the predicted label of recently seen keys in an LRU
+cache and only calls the model for the keys it has not seen.
+
+The cache is cleared whenever the model changes: ``reset`` swaps in a new
+model, and with a ``model_path`` the artifact's modification time and size are
+checked before every batch and a changed file is reloaded.
+"""
+
+import os
+from collections import OrderedDict
+
+import numpy as np
+import scipy.sparse as sp
+
+from loading import SCORE_COLUMNS
+from score import load_model
+
+# Scores and class, ahead of the doctor one-hot block in the feature matrix.
+N_NUMERIC = len(SCORE_COLUMNS) + 1
+VALUE_BITS = 4
+DOCTOR_SHIFT = N_NUMERIC * VALUE_BITS
+MAX_DOCTORS = (1 << (63 - DOCTOR_SHIFT)) - 1
+
+MAX_SIZE = 100000
+
+_MISSING = object()
+
+
+def pack_keys(X):
+    """Return one ``int64`` key per row of a model feature matrix.
+
+    Raises ValueError if a score is not an integer in 0-15 or there are too
+    many doctor columns to pack.
+    """
+    X = X.toarray() if sp.issparse(X) else np.asarray(X)
+    numeric = X[:, :N_NUMERIC]
+    values = numeric.astype(np.int64)
+    if (values != numeric).any() or (values < 0).any() or (values >= 1 << VALUE_BITS).any():
+        raise ValueError('scores must be integers between 0 and %d' % ((1 << VALUE_BITS) - 1))
+    if X.shape[1] - N_NUMERIC > MAX_DOCTORS:
+        raise ValueError('cannot pack more than %d doctor columns' % MAX_DOCTORS)
+
+    keys = np.zeros(len(X), dtype=np.int64)
+    for i in range(N_NUMERIC):
+        keys <<= VALUE_BITS
+        keys |= values[:, i]
+    one_hot = X[:, N_NUMERIC:]
+    if one_hot.shape[1]:
+        doctor = np.where(one_hot.any(axis=1), one_hot.argmax(axis=1) + 1, 0)
+        keys |= doctor.astype(np.int64) << DOCTOR_SHIFT
+    return keys
+
+
+class CachedPredictor:
+    """LRU cache of ``clf.predict`` results in front of a fitted classifier.
+
+    Parameters
+    ----------
+    clf : classifier
+        Fitted model taking the ``feature_matrix`` layout.
+    maxsize : int
+        Number of distinct feature vectors kept; the least recently used one
+        is evicted first.
+    model_path : str, optional
+        Artifact ``clf`` was loaded from.  When the file changes the model is
+        reloaded from it and the cache cleared.
+    """
+
+    def __init__(self, clf, maxsize=MAX_SIZE, model_path=None):
+        self.clf = clf
+        self.maxsize = maxsize
+        self.model_path = model_path
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._cache = OrderedDict()
+        self._signature = self._artifact_signature()
+
+    def _artifact_signature(self):
+        if self.model_path is None:
+            return None
+        stat = os.stat(self.model_path)
+        return stat.st_mtime_ns, stat.st_size
+
+    def reset(self, clf=None):
+        """Clear the cache, switching to ``clf`` if one is given."""
+        if clf is not None:
+            self.clf = clf
+        self._cache.clear()
+
+    def predict(self, X):
+        # Rows are selected positionally below, which a DataFrame would take
+        # as column labels.
+        X = X.tocsr() if sp.issparse(X) else np.asarray(X)
+        if self.model_path is not None:
+            signature = self._artifact_signature()
+            if signature != self._signature:
+                self.reset(load_model(self.model_path)[1])
+                self._signature = signature
+
+        keys, first, inverse = np.unique(pack_keys(X), return_index=True, return_inverse=True)
+        inverse = inverse.ravel()
+        labels = np.empty(len(keys), dtype=self.clf.classes_.dtype)
+        missing = []
+        for i, key in enumerate(keys.tolist()):
+            label = self._cache.get(key, _MISSING)
+            if label is _MISSING:
+                missing.append(i)
+            else:
+                self._cache.move_to_end(key)
+                labels[i] = label
+
+        rows = np.bincount(inverse, minlength=len(keys))
+        if missing:
+            missing = np.array(missing)
+            labels[missing] = self.clf.predict(X[first[missing]])
+            for key, label in zip(keys[missing].tolist(), labels[missing]):
+                self._cache[key] = label
+            while len(self._cache) > self.maxsize:
+                self._cache.popitem(last=False)
+                self.evictions += 1
+            missed = int(rows[missing].sum())
+        else:
+            missed = 0
+        self.misses += missed
+        self.hits += len(inverse) - missed
+        return labels[inverse]
+
+    def stats(self):
+        """Return the hit, miss and eviction counts and the hit rate."""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'size': len(self._cache),
+            'maxsize': self.maxsize,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,173 @@
+"""Fit-once preprocessing for the breast cancer data.
+
+``BreastCancerPreprocessor`` packages the cleaning cells of the notebook
+(``dropna``, ``drop_duplicates`` on ``patient_id``, ``get_dummies`` on
+``doctor_name``, the ``class`` mapping and the ``bare_nuclei`` coercion) into
+a single scikit-learn transformer.  It is fitted once on the training data,
+which fixes the doctor vocabulary and the output column order, and can then be
+saved and applied to new batches at scoring time.
+
+Like the notebook's cleaning, it drops rows, and the target
+(``cell_type_label``) is engineered from the cleaned rows rather than passed
+in.  That breaks the row alignment an sklearn ``Pipeline`` relies on, so it is
+deliberately not a pipeline step: callers run ``transform_frame`` and take
+both the features and the target from its result, as ``pipeline.py`` and
+``score.py`` do.
+
+Rows are filtered with one combined boolean mask and the output is assembled
+column by column, so no intermediate full copies of the frame are made.  The
+doctor is kept as a single ``doctor_code`` column (see ``encoding.py``) and
+only expanded to one-hot columns by ``feature_matrix``.
+
+Every feature is a small integer, so the feature matrix is ``uint8`` by
+default: an eighth of the notebook's ``float64``.  ``dtype`` selects a wider
+type for estimators that should not convert it themselves.
+"""
+
+import joblib
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from sklearn.base import BaseEstimator, TransformerMixin
+from sklearn.utils.validation import check_is_fitted
+
+from encoding import DoctorEncoder
+from features import cell_type_label, new_column
+from instrumentation import stage
+from loading import CLASS_CATEGORIES, SCORE_COLUMNS, valid_scores
+
+INPUT_COLUMNS = ['patient_id'] + SCORE_COLUMNS + ['class', 'doctor_name']
+
+# Widest first: ``evaluation.precision_report`` compares against the first.
+FEATURE_DTYPES = ('float64', 'float32', 'uint8')
+
+
+class BreastCancerPreprocessor(BaseEstimator, TransformerMixin):
+    """Clean, one-hot encode and feature-engineer raw patient records.
+
+    Parameters
+    ----------
+    drop_duplicates : bool, default=True
+        Keep only the first row of each ``patient_id`` within a batch.
+    sparse : bool, default=False
+        Make ``transform`` return a CSR matrix instead of a dense frame.
+    dtype : str, default='uint8'
+        Element type of the feature matrix, one of ``FEATURE_DTYPES``.
+
+    ``transform`` returns fewer rows than it is given and the labels come
+    from ``transform_frame``, so do not chain it with an estimator in a
+    ``Pipeline``.
+    """
+
+    def __init__(self, drop_duplicates=True, sparse=False, dtype='uint8'):
+        self.drop_duplicates = drop_duplicates
+        self.sparse = sparse
+        self.dtype = dtype
+
+    def fit(self, X, y=None):
+        if self.dtype not in FEATURE_DTYPES:
+            raise ValueError('dtype must be one of %s' % ', '.join(FEATURE_DTYPES))
+        self.encoder_ = DoctorEncoder().fit(X['doctor_name'])
+        self.doctors_ = self.encoder_.vocabulary_
+        self.feature_names_out_ = np.array(
+            SCORE_COLUMNS + ['class'] + self.doctors_, dtype=object)
+        return self
+
+    def get_feature_names_out(self, input_features=None):
+        check_is_fitted(self, 'feature_names_out_')
+        return self.feature_names_out_
+
+    def transform(self, X):
+        """Return the model feature matrix for the valid rows of ``X``.
+
+        A frame with ``get_feature_names_out()`` columns, or a CSR matrix when
+        ``sparse`` is set.  Incomplete, duplicate and unparseable rows are
+        dropped, so the result is not aligned with ``X`` or a ``y`` passed
+        alongside it; a dense result keeps the index of the rows kept.
+        """
+        frame = self.transform_frame(X)
+        features = self.feature_matrix(frame, sparse=self.sparse)
+        if self.sparse:
+            return features
+        return pd.DataFrame(features, columns=list(self.feature_names_out_), index=frame.index)
+
+    def feature_matrix(self, frame, sparse=False, dtype=None):
+        """Return the model features of a ``transform_frame`` result.
+
+        The cytology scores and ``class`` come first, followed by one one-hot
+        column per doctor, in ``get_feature_names_out()`` order.  With
+        ``sparse`` the result is a CSR matrix and the one-hot block is never
+        materialized densely.  ``dtype`` defaults to the fitted ``dtype``.
+        """
+        check_is_fitted(self, 'encoder_')
+        if dtype is None:
+            dtype = self.dtype
+        numeric = frame[SCORE_COLUMNS + ['class']].to_numpy(dtype=dtype)
+        doctors = self.encoder_.one_hot(frame['doctor_code'].to_numpy(), sparse=sparse, dtype=dtype)
+        if sparse:
+            return sp.hstack([sp.csr_matrix(numeric), doctors], format='csr')
+        return np.hstack([numeric, doctors])
+
+    def transform_frame(self, X, dedup=None):
+        """Return ``patient_id``, the features, ``new_column`` and ``cell_type_label``.
+
+        The doctor is returned as an ``int32`` ``doctor_code`` column; doctors
+        that were not seen during ``fit`` get the code -1, which
+        ``feature_matrix`` turns into an all-zero one-hot row.
+
+        ``dedup`` is a ``Deduplicator`` shared between the chunks of a stream.
+        It replaces the within-batch duplicate rule with the same rule applied
+        across every chunk passed with it, so the rows kept do not depend on
+        where the chunk boundaries fall.
+
+        Rows with a score that is not a whole number between 1 and 10 are
+        dropped along with the non-numeric ``bare_nuclei`` ones, the same
+        records ``serve.py`` rejects, instead of wrapping around in ``uint8``.
+        """
+        check_is_fitted(self, 'doctors_')
+        with stage('clean', rows=len(X)):
+            complete = X[INPUT_COLUMNS].notna().all(axis=1)
+            bare_nuclei = pd.to_numeric(X['bare_nuclei'], errors='coerce')
+            # Category codes give the notebook's change_class_numeric mapping,
+            # benign -> 0 and malignant -> 1.
+            classes = pd.Categorical(X['class'], categories=CLASS_CATEGORIES).codes
+            mask = complete.to_numpy() & bare_nuclei.notna().to_numpy()
+            mask &= classes >= 0
+            for column in SCORE_COLUMNS:
+                values = bare_nuclei if column == 'bare_nuclei' else X[column]
+                mask &= valid_scores(values)
+
+        # Duplicates are resolved among the complete rows, before the
+        # non-numeric bare_nuclei rows are dropped, as in the notebook.
+        if dedup is not None:
+            with stage('dedup', rows=len(X)):
+                keep = np.ones(len(X), dtype=bool)
+                keep[complete.to_numpy()] = dedup.mask(X.loc[complete, ['patient_id']])
+                mask &= keep
+        elif self.drop_duplicates:
+            with stage('dedup', rows=len(X)):
+                ids = X['patient_id'].where(complete)
+                mask &= ~(ids.duplicated(keep='first') & ids.notna()).to_numpy()
+
+        with stage('encode') as s:
+            out = {'patient_id': X['patient_id'].to_numpy()[mask].astype(np.int64)}
+            for column in SCORE_COLUMNS:
+                values = bare_nuclei if column == 'bare_nuclei' else X[column]
+                out[column] = values.to_numpy()[mask].astype(np.uint8)
+            out['class'] = classes[mask].astype(np.uint8)
+
+            out['doctor_code'] = self.encoder_.codes(X['doctor_name'].to_numpy()[mask])
+            frame = pd.DataFrame(out, index=X.index[mask])
+            s.rows = len(frame)
+
+        # Each feature is recorded as its own stage by ``instrument``.
+        frame['new_column'] = new_column(frame)
+        frame['cell_type_label'] = cell_type_label(frame)
+        return frame
+
+    def save(self, path):
+        joblib.dump(self, path)
+
+    @staticmethod
+    def load(path):
+        return joblib.load(path)
@@ -0,0 +1,158 @@
+"""Single-pass data-quality profile of raw patient records.
+
+The notebook checks the data with a dozen separate ``isnull()``,
+``np.isfinite`` and ``np.isnan`` scans of the full frame.  ``QualityReport``
+gathers the same information, plus duplicate ids and out-of-range scores, in
+one vectorized pass per chunk.  Reports built on separate chunks (or in
+separate processes) can be merged, so the profile of a streamed file is the
+same as the profile of the whole file.
+
+Run from the repository root::
+
+    python ect/quality.py data/breast_cancer_data.csv
+"""
+
+import argparse
+import json
+
+import numpy as np
+import pandas as pd
+
+from dedup import PatientIdIndex
+from loading import CHUNKSIZE, DATA_PATH, SCORE_COLUMNS, SCORE_RANGE
+
+
+class QualityReport:
+    """Mergeable counts of data-quality problems.
+
+    Attributes
+    ----------
+    rows : int
+        Rows seen.
+    incomplete_rows : int
+        Rows with at least one missing value (what ``dropna`` would remove).
+    missing : dict
+        Missing values per column.
+    non_finite : dict
+        Infinite values per cytology score column.
+    out_of_range : dict
+        Finite scores outside 1-10 per cytology score column.
+    non_numeric_bare_nuclei : int
+        ``bare_nuclei`` values present but not numbers, such as ``?``.
+    duplicate_patient_ids : int
+        Rows whose ``patient_id`` was already seen, i.e. the rows a keep-first
+        ``drop_duplicates`` would remove.
+    """
+
+    def __init__(self):
+        self.rows = 0
+        self.incomplete_rows = 0
+        self.missing = {}
+        self.non_finite = {column: 0 for column in SCORE_COLUMNS}
+        self.out_of_range = {column: 0 for column in SCORE_COLUMNS}
+        self.non_numeric_bare_nuclei = 0
+        self.duplicate_patient_ids = 0
+        # Patient ids seen so far, used to count duplicates across chunks and
+        # across merged reports.
+        self._index = PatientIdIndex()
+
+    def update(self, chunk):
+        """Add the counts of a raw ``chunk`` to the report and return it."""
+        isna = chunk.isna()
+        missing = isna.sum()
+        self.rows += len(chunk)
+        self.incomplete_rows += int(isna.any(axis=1).sum())
+        for column, count in missing.items():
+            self.missing[column] = self.missing.get(column, 0) + int(count)
+
+        scores = np.empty((len(chunk), len(SCORE_COLUMNS)), dtype=np.float64)
+        for i, column in enumerate(SCORE_COLUMNS):
+            scores[:, i] = pd.to_numeric(chunk[column], errors='coerce')
+        bare_nuclei = scores[:, SCORE_COLUMNS.index('bare_nuclei')]
+        self.non_numeric_bare_nuclei += int(
+            (np.isnan(bare_nuclei) & chunk['bare_nuclei'].notna().to_numpy()).sum())
+
+        finite = np.isfinite(scores)
+        low, high = SCORE_RANGE
+        with np.errstate(invalid='ignore'):
+            out_of_range = finite & ((scores < low) | (scores > high))
+        for column, non_finite, bad in zip(SCORE_COLUMNS,
+                                           np.isinf(scores).sum(axis=0),
+                                           out_of_range.sum(axis=0)):
+            self.non_finite[column] += int(non_finite)
+            self.out_of_range[column] += int(bad)
+
+        ids = chunk['patient_id'].dropna().to_numpy().astype(np.int64)
+        unique = np.unique(ids)
+        self.duplicate_patient_ids += len(ids) - len(unique)
+        self._add_ids(unique)
+        return self
+
+    def _add_ids(self, unique):
+        seen = self._index.contains(unique)
+        self.duplicate_patient_ids += int(seen.sum())
+        self._index.add(unique[~seen])
+
+    def merge(self, other):
+        """Add the counts of ``other`` to this report and return it.
+
+        ``other`` is treated as coming after this report, so its rows whose
+        ids were already seen here count as duplicates.
+        """
+        self.rows += other.rows
+        self.incomplete_rows += other.incomplete_rows
+        for column, count in other.missing.items():
+            self.missing[column] = self.missing.get(column, 0) + count
+        for column in SCORE_COLUMNS:
+            self.non_finite[column] += other.non_finite[column]
+            self.out_of_range[column] += other.out_of_range[column]
+        self.non_numeric_bare_nuclei += other.non_numeric_bare_nuclei
+        self.duplicate_patient_ids += other.duplicate_patient_ids
+        # The runs of an index are disjoint, so each is unique on its own.
+        for run in other._index.runs:
+            self._add_ids(run)
+        return self
+
+    @property
+    def clean(self):
+        """True when the report found no problems at all."""
+        return not (self.incomplete_rows or self.non_numeric_bare_nuclei
+                    or self.duplicate_patient_ids
+                    or any(self.non_finite.values()) or any(self.out_of_range.values()))
+
+    def to_dict(self):
+        return {
+            'rows': self.rows,
+            'unique_patient_ids': len(self._index),
+            'incomplete_rows': self.incomplete_rows,
+            'missing': dict(self.missing),
+            'non_finite': dict(self.non_finite),
+            'out_of_range': dict(self.out_of_range),
+            'non_numeric_bare_nuclei': self.non_numeric_bare_nuclei,
+            'duplicate_patient_ids': self.duplicate_patient_ids,
+        }
+
+
+def profile(df):
+    """Return the ``QualityReport`` of one raw frame."""
+    return QualityReport().update(df)
+
+
+def profile_csv(path=DATA_PATH, chunksize=CHUNKSIZE):
+    """Return the ``QualityReport`` of ``path``, read in chunks."""
+    report = QualityReport()
+    for chunk in pd.read_csv(path, chunksize=chunksize):
+        report.update(chunk)
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Profile the data quality of a patient CSV.')
+    parser.add_argument('input', nargs='?', default=DATA_PATH)
+    parser.add_argument('--chunksize', type=int, default=CHUNKSIZE)
+    args = parser.parse_args(argv)
+    print(json.dumps(profile_csv(args.input, args.chunksize).to_dict(), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,164 @@
+"""Local, versioned registry of trained models.
+
+Each registered model is stored as ``<root>/<name>/<version>/`` with
+
+- ``model.joblib``: the fitted preprocessing and estimator, in the same
+  layout ``score.py`` writes;
+- ``model-flat.joblib``, for random forests only: the same artifact with the
+  forest compiled into a ``FlatForest`` (see ``forest_compiler.py``), dumped
+  uncompressed;
+- ``metadata.json``: the feature column order, the SHA-256 of the training
+  data, metrics, library versions and the time of registration.
+
+Unpickling an sklearn tree copies its node arrays, so a forest loaded from
+``model.joblib`` always costs each process a full copy of its trees.  Loading
+with ``mmap_mode='r'`` therefore uses ``model-flat.joblib`` when it exists:
+its arrays are plain NumPy arrays that stay mapped, so a scoring process
+starts without reading them into memory and every process that loads the
+same version shares one copy of their pages through the OS page cache.
+Predictions are identical to those of the sklearn forest.
+
+Run from the repository root::
+
+    python ect/registry.py list
+    python ect/registry.py show random-forest
+"""
+
+import argparse
+import datetime
+import json
+import os
+import shutil
+import tempfile
+
+import joblib
+import numpy as np
+import sklearn
+
+from forest_compiler import compile_forest, is_compilable
+
+REGISTRY_DIR = 'models'
+ARTIFACT = 'model.joblib'
+COMPILED_ARTIFACT = 'model-flat.joblib'
+METADATA = 'metadata.json'
+
+
+def artifact_path(directory, mmap_mode=None):
+    """Return the artifact of a version ``directory`` to load with ``mmap_mode``.
+
+    Memory-mapped loads use the compiled forest when the version has one,
+    since only its arrays can be mapped.
+    """
+    compiled = os.path.join(directory, COMPILED_ARTIFACT)
+    if mmap_mode is not None and os.path.exists(compiled):
+        return compiled
+    return os.path.join(directory, ARTIFACT)
+
+
+class ModelRegistry:
+    """Save and load versioned model artifacts under ``root``."""
+
+    def __init__(self, root=REGISTRY_DIR):
+        self.root = root
+
+    def names(self):
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(name for name in os.listdir(self.root)
+                      if os.path.isdir(os.path.join(self.root, name)))
+
+    def versions(self, name):
+        """Return the registered versions of ``name``, oldest first."""
+        directory = os.path.join(self.root, name)
+        if not os.path.isdir(directory):
+            return []
+        return sorted(int(version) for version in os.listdir(directory) if version.isdigit())
+
+    def latest(self, name):
+        versions = self.versions(name)
+        if not versions:
+            raise KeyError('no model registered as %r in %s' % (name, self.root))
+        return versions[-1]
+
+    def path(self, name, version=None):
+        """Return the directory of ``name`` at ``version`` (latest by default)."""
+        if version is None:
+            version = self.latest(name)
+        return os.path.join(self.root, name, str(version))
+
+    def register(self, name, model, preprocessor, feature_columns, data_hash,
+                 metrics=None, **extra):
+        """Store a new version of ``name`` and return its version number."""
+        directory = os.path.join(self.root, name)
+        os.makedirs(directory, exist_ok=True)
+        tmp = tempfile.mkdtemp(dir=directory, prefix='.tmp-')
+        try:
+            joblib.dump({'preprocessor': preprocessor, 'model': model},
+                        os.path.join(tmp, ARTIFACT))
+            if is_compilable(model):
+                joblib.dump({'preprocessor': preprocessor, 'model': compile_forest(model)},
+                            os.path.join(tmp, COMPILED_ARTIFACT))
+            metadata = dict(extra,
+                            name=name,
+                            estimator=type(model).__name__,
+                            params=model.get_params(),
+                            feature_columns=[str(column) for column in feature_columns],
+                            data_hash=data_hash,
+                            metrics=metrics or {},
+                            sklearn_version=sklearn.__version__,
+                            numpy_version=np.__version__,
+                            created=datetime.datetime.now(datetime.timezone.utc).isoformat())
+            with open(os.path.join(tmp, METADATA), 'w') as f:
+                json.dump(metadata, f, indent=2, default=str)
+            # Claim the next version number; os.rename fails if another
+            # process registered it first, in which case try the next one.
+            version = self.versions(name)[-1] + 1 if self.versions(name) else 1
+            while True:
+                try:
+                    os.rename(tmp, os.path.join(directory, str(version)))
+                    return version
+                except OSError:
+                    if not os.path.exists(os.path.join(directory, str(version))):
+                        raise
+                    version += 1
+        except BaseException:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+
+    def metadata(self, name, version=None):
+        with open(os.path.join(self.path(name, version), METADATA)) as f:
+            return json.load(f)
+
+    def load(self, name, version=None, mmap_mode='r'):
+        """Return ``(preprocessor, model, metadata)`` for ``name`` at ``version``.
+
+        With ``mmap_mode`` a registered forest is returned in its compiled,
+        memory-mapped form; pass ``mmap_mode=None`` for the sklearn estimator.
+        """
+        directory = self.path(name, version)
+        artifact = joblib.load(artifact_path(directory, mmap_mode), mmap_mode=mmap_mode)
+        with open(os.path.join(directory, METADATA)) as f:
+            metadata = json.load(f)
+        return artifact['preprocessor'], artifact['model'], metadata
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Inspect the model registry.')
+    parser.add_argument('--root', default=REGISTRY_DIR)
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('list', help='list registered models and versions')
+    show = commands.add_parser('show', help='print the metadata of a model version')
+    show.add_argument('name')
+    show.add_argument('version', nargs='?', type=int, default=None)
+    args = parser.parse_args(argv)
+
+    registry = ModelRegistry(args.root)
+    if args.command == 'list':
+        for name in registry.names():
+            print('%s: %s' % (name, ', '.join(str(v) for v in registry.versions(name))))
+    else:
+        print(json.dumps(registry.metadata(args.name, args.version), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,152 @@
+"""Cached EDA report with incremental re-rendering.
+
+All of the aggregates behind the notebook's EDA output are computed together
+from one cleaned frame: a single ``(doctor_name, class)`` count table from
+which the per-doctor and per-class totals are derived, the ``describe``
+tables and the correlation matrix.  They are cached under a content hash of
+the source CSV, so an unchanged dataset is never re-aggregated.
+
+Figures are only re-rendered when the digest of the aggregate they draw from
+differs from the one recorded in the manifest next to them, or when the image
+is missing.  Regenerating the report on unchanged data is therefore a hash of
+the CSV plus a few small file reads.  The figures and tables themselves are
+drawn from the aggregates by ``eda.py``.
+
+Run from the repository root::
+
+    python ect/report.py --output report
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import pickle
+
+import pandas as pd
+
+from eda import (plot_class_per_doctor, plot_correlation, plot_patients_per_doctor,
+                 summary_tables)
+from feature_store import file_hash
+from loading import DATA_PATH
+from preprocessing import BreastCancerPreprocessor
+
+CACHE_DIR = '.report_cache'
+# Untracked, so reports never mix with the notebook's committed images/.
+REPORT_DIR = 'report'
+MANIFEST = '.report-manifest.json'
+
+# Bump when the aggregates or figures change so old caches are ignored.
+REPORT_VERSION = 2
+
+
+def compute_aggregates(df, frame):
+    """Return every EDA aggregate for a cleaned ``df`` and engineered ``frame``."""
+    doctor_class = df.groupby(['doctor_name', 'class'], observed=True).size()
+    numeric = frame.drop(columns=['patient_id', 'doctor_code']).astype('float64')
+    return {
+        'rows': len(df),
+        'doctor_class': doctor_class,
+        'patients_per_doctor': doctor_class.groupby(level='doctor_name', observed=True).sum(),
+        'class_counts': doctor_class.groupby(level='class', observed=True).sum(),
+        'bare_nuclei_class': frame.groupby(['bare_nuclei', 'class']).size(),
+        'describe': numeric.describe(),
+        'correlation': numeric.corr(),
+        'crosstab': pd.crosstab(frame['class'], frame['cell_type_label']),
+    }
+
+
+def load_aggregates(path=DATA_PATH, cache_dir=CACHE_DIR):
+    """Return the aggregates of ``path``, computing them only on a cache miss."""
+    key = '%s-v%d' % (file_hash(path), REPORT_VERSION)
+    cache_path = os.path.join(cache_dir, key + '.pkl')
+    if os.path.exists(cache_path):
+        with open(cache_path, 'rb') as f:
+            return pickle.load(f)
+
+    raw = pd.read_csv(path)
+    preprocessor = BreastCancerPreprocessor().fit(raw)
+    frame = preprocessor.transform_frame(raw)
+    aggregates = compute_aggregates(raw.loc[frame.index], frame)
+
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp = cache_path + '.tmp'
+    with open(tmp, 'wb') as f:
+        pickle.dump(aggregates, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, cache_path)
+    return aggregates
+
+
+def _digest(obj):
+    digest = hashlib.sha256()
+    if isinstance(obj, (pd.DataFrame, pd.Series)):
+        digest.update(pd.util.hash_pandas_object(obj, index=True).to_numpy().tobytes())
+        names = obj.columns if isinstance(obj, pd.DataFrame) else [obj.name]
+        digest.update(repr(list(names)).encode())
+    else:
+        digest.update(repr(obj).encode())
+    return digest.hexdigest()
+
+
+# Figure file name -> (aggregate it is drawn from, plotting function).
+FIGURES = {
+    'patients-per-doctor.png': ('patients_per_doctor', plot_patients_per_doctor),
+    'class-per-doctor.png': ('doctor_class', plot_class_per_doctor),
+    'correlation.png': ('correlation', plot_correlation),
+}
+
+
+def render(aggregates, directory=REPORT_DIR, force=False):
+    """Write the figures whose input changed and return the paths rendered."""
+    manifest_path = os.path.join(directory, MANIFEST)
+    manifest = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+
+    rendered = []
+    for name, (key, plot) in FIGURES.items():
+        path = os.path.join(directory, name)
+        digest = '%s-v%d' % (_digest(aggregates[key]), REPORT_VERSION)
+        if not force and manifest.get(name) == digest and os.path.exists(path):
+            continue
+        # Imported here so that a cache hit never loads matplotlib.
+        import matplotlib.pyplot as plt
+        os.makedirs(directory, exist_ok=True)
+        fig = plot(aggregates)
+        fig.savefig(path, bbox_inches='tight')
+        plt.close(fig)
+        manifest[name] = digest
+        rendered.append(path)
+
+    if rendered:
+        with open(manifest_path, 'w') as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+    return rendered
+
+
+def build_report(path=DATA_PATH, directory=REPORT_DIR, cache_dir=CACHE_DIR, force=False):
+    """Return the aggregates of ``path`` and the figures (re)rendered for them."""
+    aggregates = load_aggregates(path, cache_dir)
+    return aggregates, render(aggregates, directory, force=force)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Build the cached EDA report.')
+    parser.add_argument('input', nargs='?', default=DATA_PATH)
+    parser.add_argument('--output', default=REPORT_DIR)
+    parser.add_argument('--cache-dir', default=CACHE_DIR)
+    parser.add_argument('--force', action='store_true', help='re-render every figure')
+    args = parser.parse_args(argv)
+
+    aggregates, rendered = build_report(args.input, args.output, args.cache_dir, args.force)
+    for name, table in summary_tables(aggregates).items():
+        print('%s\n%s\n' % (name, table.to_string()))
+    for path in rendered:
+        print('rendered %s' % path)
+    if not rendered:
+        print('figures up to date')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+"""Batch scoring without re-running the notebook.
+
+``train`` fits the preprocessing and the notebook's production model, a
+``RandomForestClassifier(n_estimators=100)``, and saves both in one joblib
+file.  ``score`` loads that file, streams an input CSV in chunks, predicts
+each chunk and appends ``patient_id,cell_type_label`` rows to the output as it
+goes.  Given a registry version directory instead, it loads the compiled,
+memory-mapped form of the forest (see ``registry.py``).
+
+Run from the repository root::
+
+    python ect/score.py train --model model.joblib
+    python ect/score.py score --model model.joblib data/breast_cancer_data.csv submission.csv
+"""
+
+import argparse
+import os
+
+import joblib
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+
+from dedup import Deduplicator
+from evaluation import evaluate
+from feature_store import file_hash
+from instrumentation import stage
+from loading import CHUNKSIZE, DATA_PATH, read_chunks
+from preprocessing import BreastCancerPreprocessor
+from registry import ModelRegistry, artifact_path
+
+MODEL_PATH = 'model.joblib'
+REGISTERED_NAME = 'random-forest'
+
+
+def train(path=DATA_PATH, model_path=MODEL_PATH, n_jobs=None, registry=None,
+          name=REGISTERED_NAME):
+    """Fit the preprocessing and a random forest on ``path`` and save them.
+
+    With a ``registry`` directory the model is also registered there as a new
+    version of ``name``, with its cross-validated metrics.
+    """
+    raw = pd.read_csv(path)
+    preprocessor = BreastCancerPreprocessor().fit(raw)
+    frame = preprocessor.transform_frame(raw)
+    X = preprocessor.feature_matrix(frame)
+    y = frame['cell_type_label'].to_numpy()
+    clf = RandomForestClassifier(n_estimators=100, n_jobs=n_jobs).fit(X, y)
+    joblib.dump({'preprocessor': preprocessor, 'model': clf}, model_path)
+    if registry is not None:
+        results, _, _ = evaluate(X, y, names=['Random Forest'], n_jobs=n_jobs)
+        metrics = {key: float(value) for key, value in
+                   results.drop(columns=['Model']).iloc[0].items()}
+        ModelRegistry(registry).register(
+            name, clf, preprocessor, preprocessor.get_feature_names_out(),
+            file_hash(path), metrics=metrics, rows=len(frame), source=path)
+    return preprocessor, clf
+
+
+def load_model(model_path=MODEL_PATH, mmap_mode='r'):
+    """Return ``(preprocessor, model)`` saved by ``train``.
+
+    ``model_path`` may also be a registry version directory, whose compiled
+    forest is used when ``mmap_mode`` is set.
+    """
+    if os.path.isdir(model_path):
+        model_path = artifact_path(model_path, mmap_mode)
+    artifact = joblib.load(model_path, mmap_mode=mmap_mode)
+    return artifact['preprocessor'], artifact['model']
+
+
+def iter_predictions(path, preprocessor, clf, chunksize=CHUNKSIZE):
+    """Yield a ``patient_id,cell_type_label`` frame for each chunk of ``path``.
+
+    The file is read with the explicit schema of ``loading.read_chunks``, so
+    every chunk has the same dtypes.  Invalid rows are dropped as in training;
+    duplicate patient ids keep the first occurrence across the whole file.
+    """
+    dedup = Deduplicator()
+    for chunk in read_chunks(path, chunksize=chunksize):
+        frame = preprocessor.transform_frame(chunk, dedup=dedup)
+        if not len(frame):
+            continue
+        X = preprocessor.feature_matrix(frame)
+        with stage('predict', rows=len(X)):
+            y_pred = clf.predict(X)
+        yield pd.DataFrame({
+            'patient_id': frame['patient_id'].to_numpy(),
+            'cell_type_label': y_pred,
+        })
+
+
+def score(path, output, model_path=MODEL_PATH, chunksize=CHUNKSIZE):
+    """Score ``path`` with the saved model and write the submission to ``output``.
+
+    Returns the number of rows written.
+    """
+    preprocessor, clf = load_model(model_path)
+    rows = 0
+    with open(output, 'w', newline='') as f:
+        f.write('patient_id,cell_type_label\n')
+        for submission in iter_predictions(path, preprocessor, clf, chunksize):
+            with stage('write_submission', rows=len(submission)):
+                submission.to_csv(f, header=False, index=False)
+            rows += len(submission)
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Train or score the breast cancer model.')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    train_parser = commands.add_parser('train', help='fit and save the model')
+    train_parser.add_argument('input', nargs='?', default=DATA_PATH)
+    train_parser.add_argument('--model', default=MODEL_PATH)
+    train_parser.add_argument('--n-jobs', type=int, default=None)
+    train_parser.add_argument('--registry', metavar='DIR', default=None,
+                              help='also register the model as a new version in DIR')
+    train_parser.add_argument('--name', default=REGISTERED_NAME)
+
+    score_parser = commands.add_parser('score', help='write a submission from a saved model')
+    score_parser.add_argument('input')
+    score_parser.add_argument('output', nargs='?', default='submission.csv')
+    score_parser.add_argument('--model', default=MODEL_PATH,
+                              help='model file, or a registry version directory')
+    score_parser.add_argument('--chunksize', type=int, default=CHUNKSIZE)
+
+    args = parser.parse_args(argv)
+    if args.command == 'train':
+        train(args.input, args.model, n_jobs=args.n_jobs, registry=args.registry,
+              name=args.name)
+        print('saved %s' % args.model)
+    else:
+        rows = score(args.input, args.output, args.model, args.chunksize)
+        print('wrote %d rows to %s' % (rows, args.output))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,318 @@
+"""In-process prediction server for single patient records.
+
+The model and the doctor one-hot vocabulary saved by ``score.py train`` stay
+loaded for the life of the process.  Each request is turned straight into a
+NumPy feature vector, skipping pandas, and concurrent requests are grouped into
+micro-batches so the classifier is called once per batch rather than once per
+record.
+
+The server speaks a minimal HTTP/1.1 over TCP or a Unix socket::
+
+    python ect/serve.py --model model.joblib --port 8080
+    curl -d '{"patient_id": 1000025, "clump_thickness": 5, ...}' localhost:8080/predict
+
+``POST /predict`` accepts one JSON record, or a list of records, with the
+columns of ``data/breast_cancer_data.csv`` and answers with
+``{"patient_id": ..., "cell_type_label": ...}`` for each.
+
+With ``--cache-size`` predictions of recently seen feature vectors are served
+from a ``prediction_cache.CachedPredictor``; ``GET /health`` reports its hit
+rate.
+
+The classifier runs on a single worker thread, so the event loop keeps
+accepting and parsing requests while a batch is scored.  A model that fails to
+predict answers the batch's requests with ``500``.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from loading import CLASS_CATEGORIES, SCORE_COLUMNS, SCORE_RANGE
+from prediction_cache import CachedPredictor
+from score import MODEL_PATH, load_model
+
+MAX_BATCH = 64
+MAX_DELAY = 0.001
+
+
+class FeatureBuilder:
+    """Build model feature vectors from record dicts without pandas."""
+
+    def __init__(self, doctors):
+        self.doctors = list(doctors)
+        self.doctor_index = {doctor: i for i, doctor in enumerate(self.doctors)}
+        self.class_index = {name: i for i, name in enumerate(CLASS_CATEGORIES)}
+        self.n_features = len(SCORE_COLUMNS) + 1 + len(self.doctors)
+
+    def build(self, record, out=None):
+        """Fill and return a uint8 feature vector for ``record``.
+
+        Raises ValueError for a missing or non-numeric score, a score that is
+        not a whole number between 1 and 10 or an unknown class, which are the
+        rows ``BreastCancerPreprocessor`` drops.  Unknown doctors get an all-zero one-hot.
+        """
+        if out is None:
+            out = np.zeros(self.n_features, dtype=np.uint8)
+        else:
+            out[:] = 0
+        low, high = SCORE_RANGE
+        for i, column in enumerate(SCORE_COLUMNS):
+            try:
+                value = float(record[column])
+            except (KeyError, TypeError, ValueError):
+                raise ValueError('%s must be a number' % column)
+            if not (low <= value <= high and value.is_integer()):
+                raise ValueError('%s must be a whole number between %d and %d'
+                                 % (column, low, high))
+            out[i] = value
+        try:
+            out[len(SCORE_COLUMNS)] = self.class_index[record['class']]
+        except KeyError:
+            raise ValueError('class must be one of %s' % ', '.join(CLASS_CATEGORIES))
+        doctor = self.doctor_index.get(record.get('doctor_name'))
+        if doctor is not None:
+            out[len(SCORE_COLUMNS) + 1 + doctor] = 1
+        return out
+
+
+class Predictor:
+    """Micro-batching front end to a fitted classifier.
+
+    ``predict`` queues a feature vector and waits; a background task collects
+    up to ``max_batch`` queued vectors, waiting at most ``max_delay`` seconds
+    after the first, and predicts them with a single ``clf.predict`` call on
+    ``executor``, a single thread that every call touching the model goes
+    through.
+    """
+
+    def __init__(self, clf, n_features, max_batch=MAX_BATCH, max_delay=MAX_DELAY):
+        self.clf = clf
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.batch = np.zeros((max_batch, n_features), dtype=np.uint8)
+        self.queue = asyncio.Queue()
+        self.task = None
+        self.executor = ThreadPoolExecutor(1)
+
+    def start(self):
+        self.task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+        self.executor.shutdown(wait=False)
+
+    async def predict(self, vectors):
+        loop = asyncio.get_running_loop()
+        futures = []
+        for vector in vectors:
+            future = loop.create_future()
+            self.queue.put_nowait((vector, future))
+            futures.append(future)
+        return await asyncio.gather(*futures)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            pending = [await self.queue.get()]
+            deadline = loop.time() + self.max_delay
+            while len(pending) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    pending.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            for i, (vector, _) in enumerate(pending):
+                self.batch[i] = vector
+            try:
+                # The batch buffer is not refilled until this returns.
+                labels = await loop.run_in_executor(
+                    self.executor, self.clf.predict, self.batch[:len(pending)])
+            except Exception as exc:
+                for _, future in pending:
+                    if not future.done():
+                        future.set_exception(exc)
+                continue
+            for (_, future), label in zip(pending, labels):
+                if not future.done():
+                    future.set_result(label.item())
+
+
+async def _read_request(reader):
+    request_line = await reader.readline()
+    if not request_line:
+        return None
+    method, target, _ = request_line.decode('latin-1').split(' ', 2)
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+    length = int(headers.get('content-length', 0))
+    body = await reader.readexactly(length) if length else b''
+    return method, target, headers, body
+
+
+def _response(status, payload, keep_alive):
+    body = json.dumps(payload).encode()
+    head = ('HTTP/1.1 %s\r\n'
+            'Content-Type: application/json\r\n'
+            'Content-Length: %d\r\n'
+            'Connection: %s\r\n\r\n'
+            % (status, len(body), 'keep-alive' if keep_alive else 'close'))
+    return head.encode('latin-1') + body
+
+
+class PredictionServer:
+    """Serve ``POST /predict`` and ``GET /health`` from a warm model.
+
+    With a ``model_path`` and ``reload_interval`` the file is polled and a
+    newer model (for example a checkpoint from ``online.py``) is loaded in a
+    worker thread and swapped in between batches, without dropping requests.
+    With a ``cache_size`` predictions go through a ``CachedPredictor``, which
+    is cleared on reload.
+    """
+
+    def __init__(self, preprocessor, clf, max_batch=MAX_BATCH, max_delay=MAX_DELAY,
+                 model_path=None, reload_interval=None, cache_size=None):
+        self.features = FeatureBuilder(preprocessor.doctors_)
+        self.cache = CachedPredictor(clf, cache_size) if cache_size else None
+        self.clf = self.cache if self.cache is not None else clf
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.model_path = model_path
+        self.reload_interval = reload_interval
+        self.predictor = None
+        self._mtime = os.stat(model_path).st_mtime_ns if model_path else None
+
+    async def _watch(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.reload_interval)
+            try:
+                mtime = os.stat(self.model_path).st_mtime_ns
+            except OSError:
+                continue
+            if mtime == self._mtime:
+                continue
+            try:
+                preprocessor, clf = await loop.run_in_executor(None, load_model, self.model_path)
+            except Exception as exc:
+                print('not reloading %s: %s' % (self.model_path, exc), file=sys.stderr)
+                continue
+            self._mtime = mtime
+            if list(preprocessor.doctors_) != self.features.doctors:
+                print('not reloading %s: doctor vocabulary changed, restart to pick it up'
+                      % self.model_path, file=sys.stderr)
+                continue
+            # The batcher reads self.clf once per batch, so this is atomic; the
+            # cache is reset on the predictor thread so no batch sees it cleared
+            # halfway.
+            if self.cache is not None:
+                await loop.run_in_executor(self.predictor.executor, self.cache.reset, clf)
+            else:
+                self.clf = self.predictor.clf = clf
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                request = await _read_request(reader)
+                if request is None:
+                    break
+                method, target, headers, body = request
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                status, payload = await self.dispatch(method, target, body)
+                writer.write(_response(status, payload, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def dispatch(self, method, target, body):
+        if method == 'GET' and target == '/health':
+            payload = {'status': 'ok'}
+            if self.cache is not None:
+                payload['cache'] = self.cache.stats()
+            return '200 OK', payload
+        if method != 'POST' or target != '/predict':
+            return '404 Not Found', {'error': 'not found'}
+        try:
+            records = json.loads(body)
+            single = isinstance(records, dict)
+            if single:
+                records = [records]
+            vectors = [self.features.build(record) for record in records]
+        except (ValueError, TypeError, AttributeError) as exc:
+            return '400 Bad Request', {'error': str(exc)}
+        try:
+            labels = await self.predictor.predict(vectors)
+        except Exception as exc:
+            print('prediction failed: %r' % exc, file=sys.stderr)
+            return '500 Internal Server Error', {'error': 'prediction failed'}
+        results = [{'patient_id': record.get('patient_id'), 'cell_type_label': label}
+                   for record, label in zip(records, labels)]
+        return '200 OK', results[0] if single else results
+
+    async def serve(self, host='127.0.0.1', port=8080, path=None):
+        self.predictor = Predictor(self.clf, self.features.n_features,
+                                   self.max_batch, self.max_delay)
+        self.predictor.start()
+        watcher = None
+        if self.model_path and self.reload_interval:
+            watcher = asyncio.get_running_loop().create_task(self._watch())
+        if path is not None:
+            server = await asyncio.start_unix_server(self.handle, path=path)
+        else:
+            server = await asyncio.start_server(self.handle, host, port)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            if watcher is not None:
+                watcher.cancel()
+            await self.predictor.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Serve single-record predictions.')
+    parser.add_argument('--model', default=MODEL_PATH)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--unix', metavar='PATH', help='listen on a Unix socket instead')
+    parser.add_argument('--max-batch', type=int, default=MAX_BATCH)
+    parser.add_argument('--max-delay', type=float, default=MAX_DELAY,
+                        help='seconds to wait for a micro-batch to fill')
+    parser.add_argument('--reload-interval', type=float, default=None,
+                        help='poll the model file every this many seconds and reload it when it changes')
+    parser.add_argument('--cache-size', type=int, default=None,
+                        help='cache predictions for this many distinct feature vectors')
+    args = parser.parse_args(argv)
+
+    preprocessor, clf = load_model(args.model)
+    server = PredictionServer(preprocessor, clf, args.max_batch, args.max_delay,
+                              args.model, args.reload_interval, args.cache_size)
+    try:
+        asyncio.run(server.serve(args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
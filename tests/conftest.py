@@ -0,0 +1,41 @@
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'ect'))
+
+from loading import DATA_PATH  # noqa: E402
+from preprocessing import BreastCancerPreprocessor  # noqa: E402
+
+
+@pytest.fixture
+def data_path():
+    """The notebook's CSV, wherever pytest is run from."""
+    return os.path.join(os.path.dirname(__file__), '..', DATA_PATH)
+
+
+@pytest.fixture
+def raw(data_path):
+    return pd.read_csv(data_path)
+
+
+@pytest.fixture
+def preprocessor(raw):
+    return BreastCancerPreprocessor().fit(raw)
+
+
+@pytest.fixture
+def frame(preprocessor, raw):
+    return preprocessor.transform_frame(raw)
+
+
+@pytest.fixture
+def X(preprocessor, frame):
+    return preprocessor.feature_matrix(frame)
+
+
+@pytest.fixture
+def y(frame):
+    return frame['cell_type_label'].to_numpy()
@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+
+from dedup import Deduplicator, PatientIdIndex
+
+
+def test_index_contains_added_ids_and_merges_runs():
+    index = PatientIdIndex()
+    rng = np.random.default_rng(0)
+    ids = rng.permutation(100000)[:20000]
+    for batch in np.array_split(ids, 200):
+        index.add(batch)
+
+    assert len(index) == len(ids)
+    assert len(index.runs) <= np.log2(len(ids)) + 1
+    for run in index.runs:
+        assert np.all(np.diff(run) > 0)
+    probe = np.arange(100000)
+    assert np.array_equal(index.contains(probe), np.isin(probe, ids))
+
+
+def test_index_save_and_load(tmp_path):
+    index = PatientIdIndex()
+    index.add([5, 3, 9])
+    index.add([1])
+    path = str(tmp_path / 'ids.npy')
+    index.save(path)
+
+    for mmap_mode in (None, 'r'):
+        loaded = PatientIdIndex.load(path, mmap_mode=mmap_mode)
+        assert loaded.runs[0].tolist() == [1, 3, 5, 9]
+        assert loaded.contains([1, 2, 9]).tolist() == [True, False, True]
+
+
+def frame(ids):
+    return pd.DataFrame({'patient_id': ids, 'row': np.arange(len(ids))})
+
+
+def test_keep_first_across_chunk_boundaries():
+    df = frame(np.random.default_rng(1).integers(0, 50, size=500))
+    expected = df.drop_duplicates(subset='patient_id', keep='first')
+
+    for size in (1, 7, 500):
+        dedup = Deduplicator()
+        kept = pd.concat([dedup.filter(df[start:start + size])
+                          for start in range(0, len(df), size)])
+        assert kept['row'].tolist() == expected['row'].tolist()
+        assert dedup.dropped == len(df) - len(expected)
+
+
+def test_keep_first_across_files(tmp_path):
+    first, second = frame([1, 2, 2, 3]), frame([3, 4, 1, 4])
+    paths = [str(tmp_path / 'first.csv'), str(tmp_path / 'second.csv')]
+    first.to_csv(paths[0], index=False)
+    second.to_csv(paths[1], index=False)
+
+    dedup = Deduplicator()
+    kept = pd.concat(dedup.iter_files(paths, chunksize=3))
+    assert kept['patient_id'].tolist() == [1, 2, 3, 4]
+
+    groups = dedup.duplicate_groups().sort_values('patient_id')
+    assert groups['patient_id'].tolist() == [1, 2, 3, 4]
+    assert groups['occurrences'].tolist() == [2, 2, 2, 2]
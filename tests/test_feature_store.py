@@ -0,0 +1,15 @@
+import numpy as np
+
+from feature_store import cached_features
+from preprocessing import BreastCancerPreprocessor
+
+
+def test_cache_hit_returns_the_fitted_preprocessor(tmp_path, data_path):
+    preprocessor = BreastCancerPreprocessor()
+    _, X, _, meta, built = cached_features(data_path, preprocessor, cache_dir=str(tmp_path))
+    _, X_hit, _, _, hit = cached_features(data_path, preprocessor, cache_dir=str(tmp_path))
+
+    assert not hasattr(preprocessor, 'doctors_')
+    assert built.doctors_ == hit.doctors_ == meta['doctors']
+    assert np.array_equal(X_hit, X)
+    assert list(hit.get_feature_names_out()) == meta['columns']
@@ -0,0 +1,25 @@
+import subprocess
+import sys
+
+import joblib
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+
+import forest_compiler
+from score import load_model
+
+
+def test_compiled_artifact_loads_with_load_model(tmp_path, preprocessor, X, y):
+    clf = RandomForestClassifier(n_estimators=10, random_state=0).fit(X, y)
+    model = str(tmp_path / 'model.joblib')
+    flat = str(tmp_path / 'flat.joblib')
+    joblib.dump({'preprocessor': preprocessor, 'model': clf}, model)
+
+    # Run as a script, as documented, so the class is pickled from __main__
+    # unless main() takes care not to.
+    subprocess.run([sys.executable, forest_compiler.__file__, model, flat], check=True)
+
+    _, compiled = load_model(flat)
+    assert type(compiled).__module__ == 'forest_compiler'
+    assert np.array_equal(compiled.predict_proba(X), clf.predict_proba(X))
+    assert np.array_equal(compiled.predict(X), clf.predict(X))
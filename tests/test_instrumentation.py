@@ -0,0 +1,18 @@
+import instrumentation
+
+
+def test_features_are_recorded_as_their_own_stages(raw, preprocessor):
+    recorder = instrumentation.enable()
+    try:
+        frame = preprocessor.transform_frame(raw)
+    finally:
+        instrumentation.disable()
+
+    rows = {record['stage']: record['rows'] for record in recorder.records}
+    assert rows['new_column'] == rows['cell_type_label'] == len(frame)
+
+    metrics = recorder.to_prometheus()
+    assert 'breast_cancer_stage_runs_total{stage="cell_type_label"} 1' in metrics
+    for line in metrics.splitlines():
+        if line.startswith('# TYPE') and line.endswith(' counter'):
+            assert line.split()[2].endswith('_total'), line
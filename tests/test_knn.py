@@ -0,0 +1,26 @@
+import numpy as np
+import pandas as pd
+from sklearn.neighbors import KNeighborsClassifier
+
+from knn import GridKNeighborsClassifier
+
+
+def test_mixed_bool_and_float_frame():
+    # Like the notebook's X_train: float scores next to bool doctor dummies,
+    # which np.asarray turns into an object array.
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame({
+        'clump_thickness': rng.integers(1, 11, 200).astype(np.float64),
+        'cell_size_uniformity': rng.integers(1, 11, 200).astype(np.float64),
+        'Dr. Doe': rng.random(200) < 0.5,
+    })
+    X['Dr. Lee'] = ~X['Dr. Doe']
+    y = (X['clump_thickness'] > 5).astype(int).to_numpy()
+    assert np.asarray(X).dtype == object
+
+    clf = GridKNeighborsClassifier(n_neighbors=1).fit(X, y)
+
+    # Every query row is in the training set, so its nearest bucket is itself.
+    expected = KNeighborsClassifier(n_neighbors=1).fit(X.astype(np.float64), y).predict(
+        X.astype(np.float64))
+    assert np.array_equal(clf.predict(X), expected)
@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from loading import SCORE_COLUMNS, load
+from preprocessing import BreastCancerPreprocessor
+
+
+def notebook_cleaning(path):
+    # The cleaning cells of breast-cancer.py, in order.
+    df = pd.read_csv(path)
+    df.dropna(axis=0, how='any', inplace=True)
+    df.drop_duplicates(subset="patient_id", keep='first', inplace=True)
+    df['bare_nuclei'] = pd.to_numeric(df.bare_nuclei, errors='coerce')
+    df.dropna(axis=0, how='any', inplace=True)
+    return df.reset_index(drop=True)
+
+
+@pytest.mark.parametrize('chunksize', [100000, 50, 1])
+def test_load_matches_notebook_cleaning(data_path, chunksize):
+    expected = notebook_cleaning(data_path)
+    loaded = load(data_path, chunksize=chunksize)
+
+    assert len(loaded) == len(expected)
+    assert np.array_equal(loaded['patient_id'].to_numpy(), expected['patient_id'].to_numpy())
+    for column in SCORE_COLUMNS:
+        assert np.array_equal(loaded[column].to_numpy(), expected[column].to_numpy()), column
+    assert list(loaded['class'].astype(str)) == list(expected['class'])
+    assert list(loaded['doctor_name'].astype(str)) == list(expected['doctor_name'])
+
+
+def test_out_of_range_scores_are_dropped(tmp_path, raw):
+    raw = raw.dropna().drop_duplicates(subset='patient_id')
+    raw = raw[raw['bare_nuclei'] != '?'].head(6).astype({'clump_thickness': 'float64'})
+    raw.iloc[1, raw.columns.get_loc('clump_thickness')] = 256
+    raw.iloc[2, raw.columns.get_loc('clump_thickness')] = -1
+    raw.iloc[3, raw.columns.get_loc('clump_thickness')] = 5.5
+    path = str(tmp_path / 'patients.csv')
+    raw.to_csv(path, index=False)
+    kept = raw['patient_id'].iloc[[0, 4, 5]].tolist()
+
+    assert load(path)['patient_id'].tolist() == kept
+    frame = BreastCancerPreprocessor().fit(raw).transform_frame(raw)
+    assert frame['patient_id'].tolist() == kept
@@ -0,0 +1,16 @@
+import numpy as np
+import scipy.sparse as sp
+
+from model_zoo import MODELS, compare_models
+
+
+def test_compare_models_on_sparse_features(preprocessor, frame, y):
+    X = preprocessor.feature_matrix(frame, sparse=True)
+    assert sp.issparse(X)
+
+    models, fitted, predictions = compare_models(X[:500], y[:500], X[500:], n_jobs=1)
+
+    assert sorted(models['Model']) == sorted(MODELS)
+    for name in MODELS:
+        assert predictions[name].shape == (X.shape[0] - 500,)
+        assert np.isin(predictions[name], [0, 1]).all()
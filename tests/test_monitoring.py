@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+
+from evaluation import confusion_counts
+from monitoring import MetricsAccumulator
+
+DOCTORS = ['Dr. Doe', 'Dr. Smith']
+
+
+def test_merged_batches_match_one_confusion_matrix():
+    rng = np.random.default_rng(0)
+    y_true = rng.integers(0, 2, size=1000)
+    y_pred = rng.integers(0, 2, size=1000)
+    doctor = rng.integers(-1, len(DOCTORS), size=1000)
+
+    merged = MetricsAccumulator(DOCTORS)
+    for batch in np.array_split(np.arange(1000), 7):
+        merged.merge(MetricsAccumulator(DOCTORS).update(
+            y_true[batch], y_pred[batch], doctor[batch]))
+
+    assert np.array_equal(merged.confusion, confusion_counts(y_true, y_pred))
+    for code, name in enumerate(DOCTORS):
+        rows = doctor == code
+        assert (merged.snapshot()['per_doctor'][name]['confusion']
+                == confusion_counts(y_true[rows], y_pred[rows]).tolist())
+
+
+@pytest.mark.parametrize('y_true, y_pred, doctor', [
+    ([0, 2], [0, 1], [0, 1]),
+    ([0, 1], [0, -1], [0, 1]),
+    ([0, 1], [0, 1], [0, 2]),
+])
+def test_update_rejects_invalid_labels_and_doctors(y_true, y_pred, doctor):
+    metrics = MetricsAccumulator(DOCTORS)
+    with pytest.raises(ValueError):
+        metrics.update(y_true, y_pred, doctor)
+    assert not metrics.counts.any()
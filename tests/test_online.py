@@ -0,0 +1,20 @@
+import os
+
+import joblib
+
+from online import OnlineTrainer
+
+
+def test_resume_skips_patients_already_seen(tmp_path, raw, preprocessor, frame):
+    checkpoint = str(tmp_path / 'model.joblib')
+    trainer = OnlineTrainer(preprocessor, 'Naive Bayes', checkpoint)
+    trainer.partial_fit(raw[:300])
+    trainer.partial_fit(raw[300:])
+
+    assert trainer.rows == len(frame)
+    assert 'dedup' not in joblib.load(checkpoint)
+    assert len(os.listdir(trainer.ids_dir)) == 2
+
+    resumed = OnlineTrainer.resume(checkpoint)
+    assert resumed.partial_fit(raw) == 0
+    assert resumed.rows == trainer.rows
@@ -0,0 +1,21 @@
+import joblib
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+
+from forest_compiler import FlatForest
+from parallel_inference import _worker_model, predict_parallel
+from score import load_model
+
+
+def test_workers_map_a_compiled_forest(tmp_path, preprocessor, X, y):
+    clf = RandomForestClassifier(n_estimators=10, random_state=0).fit(X, y)
+    model = str(tmp_path / 'model.joblib')
+    joblib.dump({'preprocessor': preprocessor, 'model': clf}, model)
+    workers = tmp_path / 'workers'
+    workers.mkdir()
+
+    _, shared = load_model(_worker_model(model, str(workers)))
+    assert isinstance(shared, FlatForest)
+    assert isinstance(shared.threshold, np.memmap)
+    assert np.array_equal(predict_parallel(model, X, n_workers=2, shard_size=100),
+                          clf.predict(X))
@@ -0,0 +1,82 @@
+import os
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.dummy import DummyClassifier
+
+from prediction_cache import CachedPredictor, pack_keys
+
+
+class CountingModel:
+    """Predicts the first score and records how many rows it was asked for."""
+
+    classes_ = np.arange(16)
+
+    def __init__(self, offset=0):
+        self.offset = offset
+        self.rows = 0
+
+    def predict(self, X):
+        self.rows += len(X)
+        return np.asarray(X)[:, 0].astype(np.int64) + self.offset
+
+
+def rows(*scores):
+    X = np.ones((len(scores), 12), dtype=np.uint8)
+    X[:, 0] = scores
+    X[:, 10] = 0
+    X[:, 11] = 1
+    return X
+
+
+def test_pack_keys_separates_scores_class_and_doctor():
+    X = np.ones((4, 12), dtype=np.uint8)
+    X[:, 10:] = [0, 1]
+    X[1, 0] = 2
+    X[2, 9] = 0
+    X[3, 10:] = [1, 0]
+    keys = pack_keys(X)
+    assert len(set(keys.tolist())) == 4
+    assert np.array_equal(pack_keys(pd.DataFrame(X)), keys)
+
+    X[0, 0] = 16
+    with pytest.raises(ValueError):
+        pack_keys(X)
+
+
+def test_hits_misses_and_lru_eviction():
+    model = CountingModel()
+    cache = CachedPredictor(model, maxsize=2)
+
+    assert cache.predict(rows(1, 2, 1)).tolist() == [1, 2, 1]
+    assert model.rows == 2
+    assert cache.predict(rows(1)).tolist() == [1]
+    assert model.rows == 2
+    # 2 is now the least recently used and makes room for 3.
+    cache.predict(rows(3))
+    cache.predict(rows(1, 2))
+    assert model.rows == 4
+    assert cache.stats() == {'hits': 2, 'misses': 5, 'evictions': 2, 'size': 2,
+                             'maxsize': 2, 'hit_rate': 2 / 7}
+
+
+def test_dataframe_rows_are_selected_by_position(raw, preprocessor):
+    X = preprocessor.transform(raw)
+    clf = DummyClassifier(strategy='most_frequent').fit(X.to_numpy(), np.arange(len(X)) % 2)
+
+    cached = CachedPredictor(clf).predict(X)
+    assert np.array_equal(cached, clf.predict(X.to_numpy()))
+
+
+def test_changed_artifact_is_reloaded(tmp_path):
+    path = str(tmp_path / 'model.joblib')
+    joblib.dump({'preprocessor': None, 'model': CountingModel(offset=0)}, path)
+    cache = CachedPredictor(CountingModel(offset=0), model_path=path)
+    assert cache.predict(rows(1)).tolist() == [1]
+
+    joblib.dump({'preprocessor': None, 'model': CountingModel(offset=5)}, path)
+    os.utime(path, ns=(0, 0))
+    assert cache.predict(rows(1)).tolist() == [6]
+    assert cache.stats()['misses'] == 2
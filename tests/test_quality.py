@@ -0,0 +1,15 @@
+import pytest
+
+from quality import profile, profile_csv
+
+
+@pytest.mark.parametrize('chunksize', [100000, 97, 1])
+def test_chunked_profile_matches_whole_file(data_path, raw, chunksize):
+    expected = profile(raw).to_dict()
+    assert expected['duplicate_patient_ids'] > 0
+    assert profile_csv(data_path, chunksize=chunksize).to_dict() == expected
+
+
+def test_merge_counts_duplicates_across_reports(raw):
+    merged = profile(raw[:350]).merge(profile(raw[350:]))
+    assert merged.to_dict() == profile(raw).to_dict()
@@ -0,0 +1,23 @@
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+
+from forest_compiler import FlatForest
+from registry import ModelRegistry
+from score import load_model
+
+
+def test_registered_forest_loads_compiled_and_mapped(tmp_path, preprocessor, X, y):
+    clf = RandomForestClassifier(n_estimators=10, random_state=0).fit(X, y)
+    registry = ModelRegistry(str(tmp_path))
+    version = registry.register('forest', clf, preprocessor,
+                                preprocessor.get_feature_names_out(), 'hash')
+
+    _, mapped, _ = registry.load('forest', version)
+    assert isinstance(mapped, FlatForest)
+    assert isinstance(mapped.threshold, np.memmap)
+    assert np.array_equal(mapped.predict(X), clf.predict(X))
+
+    _, unmapped, metadata = registry.load('forest', version, mmap_mode=None)
+    assert metadata['estimator'] == 'RandomForestClassifier'
+    assert isinstance(unmapped, RandomForestClassifier)
+    assert isinstance(load_model(registry.path('forest', version))[1], FlatForest)
@@ -0,0 +1,15 @@
+import pandas as pd
+from sklearn.dummy import DummyClassifier
+
+from score import iter_predictions
+
+
+def test_predictions_do_not_depend_on_chunksize(data_path, preprocessor, frame, X, y):
+    clf = DummyClassifier(strategy='most_frequent').fit(X, y)
+
+    whole = pd.concat(iter_predictions(data_path, preprocessor, clf), ignore_index=True)
+    rows = pd.concat(iter_predictions(data_path, preprocessor, clf, chunksize=1),
+                     ignore_index=True)
+
+    assert whole['patient_id'].tolist() == frame['patient_id'].tolist()
+    assert rows['patient_id'].tolist() == whole['patient_id'].tolist()
@@ -0,0 +1,28 @@
+import asyncio
+import json
+
+from loading import SCORE_COLUMNS
+from serve import PredictionServer, Predictor
+
+
+class FailingModel:
+    def predict(self, X):
+        raise RuntimeError('model is broken')
+
+
+def test_prediction_error_answers_500(preprocessor):
+    record = dict({column: 5 for column in SCORE_COLUMNS}, patient_id=1)
+    record['class'] = 'benign'
+
+    async def post():
+        server = PredictionServer(preprocessor, FailingModel())
+        server.predictor = Predictor(server.clf, server.features.n_features)
+        server.predictor.start()
+        try:
+            return await server.dispatch('POST', '/predict', json.dumps(record).encode())
+        finally:
+            await server.predictor.stop()
+
+    status, payload = asyncio.run(post())
+    assert status == '500 Internal Server Error'
+    assert payload == {'error': 'prediction failed'}